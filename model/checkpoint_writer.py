@@ -0,0 +1,119 @@
+""" Background checkpoint writer : torch.save off the training loop """
+
+import os
+import queue
+import threading
+import time
+
+import torch
+
+
+class CheckpointWriter(object):
+    """ Serialize state dicts on a background thread
+
+    save() snapshots the tensors into CPU buffers (pinned for GPU tensors,
+    so the copy is asynchronous) and queues the write; the training loop
+    only waits when `max_pending` writes are already queued. Every file is
+    written to a temporary name and renamed, so a reader (or a crash) never
+    sees a partial checkpoint. flush() waits for every queued write and is
+    called at phase boundaries, before a checkpoint is read back; wait()
+    waits for the last write of one file.
+    """
+    def __init__(self, max_pending=2):
+        self.max_pending = max_pending
+        self.queue = None
+        self.thread = None
+        self.buffers = {} # path -> CPU buffers of its last snapshot, reused
+        self.pending = {} # path -> Event set once its last queued write is done
+        self.write_time = {} # path -> seconds taken by its last write
+        self.error = None
+
+    def _start(self):
+        if self.thread is None:
+            self.queue = queue.Queue(maxsize=self.max_pending)
+            self.thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            state, path, copied, done = item
+            try:
+                if copied is not None:
+                    copied.synchronize() # asynchronous device -> pinned copies
+                start = time.time()
+                tmp = path + '.tmp'
+                torch.save(state, tmp)
+                os.replace(tmp, path)
+                self.write_time[path] = time.time()-start
+            except Exception as e: # raised again by the next save() / flush()
+                self.error = e
+            finally:
+                done.set()
+                self.queue.task_done()
+
+    def _check(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _snapshot(self, state, path):
+        "CPU copy of a state dict, into the buffers of the previous snapshot of `path` when shapes match"
+        old = self.buffers.get(path)
+        if old is None or old.keys() != state.keys() or \
+                any(old[k].shape != v.shape or old[k].dtype != v.dtype for k, v in state.items()):
+            old = {k: torch.empty(v.shape, dtype=v.dtype, pin_memory=v.is_cuda) for k, v in state.items()}
+        on_gpu = False
+        for k, v in state.items():
+            old[k].copy_(v.detach(), non_blocking=v.is_cuda)
+            on_gpu = on_gpu or v.is_cuda
+        copied = None
+        if on_gpu:
+            copied = torch.cuda.Event()
+            copied.record()
+        self.buffers[path] = old
+        return old, copied
+
+    def save(self, state, path, copy=True):
+        """ queue a write of `state` (a state dict) to `path`
+
+        With copy=False the tensors are written as they are: the caller must
+        not modify them afterwards (e.g. a CPU copy it owns).
+        """
+        self._check()
+        self._start()
+        done = self.pending.get(path)
+        if done is not None:
+            done.wait() # the buffers of `path` may still be being written
+        copied = None
+        if copy:
+            state, copied = self._snapshot(state, path)
+        done = self.pending[path] = threading.Event()
+        self.queue.put((state, path, copied, done))
+
+    def wait(self, path):
+        "wait for the last queued write of `path` only, return the seconds it took"
+        done = self.pending.get(path)
+        if done is not None:
+            done.wait()
+        self._check()
+        return self.write_time.get(path, 0.)
+
+    def flush(self):
+        "wait for every queued write"
+        if self.thread is not None:
+            self.queue.join()
+        self._check()
+
+    def close(self):
+        "flush and stop the background thread (a later save() starts it again)"
+        if self.thread is not None:
+            self.queue.put(None)
+            self.queue.join()
+            self.thread.join()
+            self.thread = None
+        self.buffers = {}
+        self._check()
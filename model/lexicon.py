@@ -0,0 +1,287 @@
+""" Class Lexicon : per-class word lists mined from attention weights """
+
+import re
+from collections import defaultdict
+
+import numpy as np
+import scipy.sparse as sp
+
+
+MATCH_PUNCT = "[!@#$%^&*().?\"~/<>:;'{}]"
+
+def match_words(sentence):
+    "split a sentence into the lower-cased words lexicon entries are matched against"
+    return re.sub(MATCH_PUNCT, "", sentence).lower().split(' ')
+
+
+class Lexicon(object):
+    """ Per-class lexicon passed in memory from lexicon mining to pseudo labeling
+
+    Every entry is a short phrase of lower-cased words. Entries are kept
+    pre-split and encoded as ids of a vocabulary that only ever grows, so an
+    id stays valid for the whole bootstrap run. `version` is bumped on every
+    update, i.e. once per bootstrap round.
+    """
+    def __init__(self, n_labels, min_len=3):
+        self.n_labels = n_labels
+        self.min_len = min_len # entries of min_len characters or less are dropped
+        self.version = 0
+        self.vocab = {} # word -> id
+        self.words = [] # id -> word
+        self.entries = [[] for _ in range(n_labels)] # per class : list of word-id tuples
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.entries)
+
+    def encode(self, word):
+        """ get the id of a word, adding it to the vocabulary if needed """
+        idx = self.vocab.get(word)
+        if idx is None:
+            idx = len(self.words)
+            self.vocab[word] = idx
+            self.words.append(word)
+        return idx
+
+    def update(self, class_entries):
+        """ replace all entries with new per-class lists of phrases (a new round)
+
+        A phrase with the same words as an earlier one of its class, in any
+        order, is dropped : it would match the same sentences.
+        """
+        assert len(class_entries) == self.n_labels
+        self.entries = []
+        for phrases in class_entries:
+            seen = set()
+            entries = []
+            for phrase in phrases:
+                phrase = phrase.lower()
+                words = phrase.split(' ')
+                key = tuple(sorted(words))
+                if len(phrase) <= self.min_len or key in seen:
+                    continue
+                seen.add(key)
+                entries.append(tuple(self.encode(word) for word in words))
+            self.entries.append(entries)
+        self.version += 1
+
+    def phrases(self, label):
+        """ entries of a class as space-joined strings """
+        return [' '.join(self.words[i] for i in entry) for entry in self.entries[label]]
+
+    def matcher(self):
+        """ LexiconMatcher over the current entries, built once per version """
+        if getattr(self, '_matcher', None) is None or self._matcher.version != self.version:
+            self._matcher = LexiconMatcher(self)
+        return self._matcher
+
+    def save(self, file):
+        """ snapshot the lexicon to a compact binary (.npz) file """
+        blob = [word.encode('utf-8') for word in self.words]
+        word_offsets = np.zeros(len(blob)+1, dtype=np.int64)
+        word_offsets[1:] = np.cumsum([len(b) for b in blob])
+
+        labels, lengths, ids = [], [], []
+        for label, entries in enumerate(self.entries):
+            for entry in entries:
+                labels.append(label)
+                lengths.append(len(entry))
+                ids.extend(entry)
+        entry_offsets = np.zeros(len(lengths)+1, dtype=np.int64)
+        entry_offsets[1:] = np.cumsum(lengths)
+
+        with open(file, 'wb') as f: # keep the name as given (np.savez appends .npz otherwise)
+            np.savez(f,
+                     header=np.array([self.n_labels, self.min_len, self.version], dtype=np.int64),
+                     word_blob=np.frombuffer(b''.join(blob), dtype=np.uint8),
+                     word_offsets=word_offsets,
+                     entry_labels=np.array(labels, dtype=np.int32),
+                     entry_offsets=entry_offsets,
+                     entry_words=np.array(ids, dtype=np.int32))
+
+    @classmethod
+    def load(cls, file):
+        """ load a lexicon snapshot written by save() """
+        with np.load(file) as data:
+            n_labels, min_len, version = (int(x) for x in data['header'])
+            blob = data['word_blob'].tobytes()
+            word_offsets = data['word_offsets']
+            labels = data['entry_labels']
+            entry_offsets = data['entry_offsets']
+            ids = data['entry_words']
+
+        lexicon = cls(n_labels, min_len)
+        lexicon.version = version
+        for i in range(len(word_offsets)-1):
+            lexicon.encode(blob[word_offsets[i]:word_offsets[i+1]].decode('utf-8'))
+        for i, label in enumerate(labels):
+            entry = ids[entry_offsets[i]:entry_offsets[i+1]]
+            lexicon.entries[label].append(tuple(int(x) for x in entry))
+        return lexicon
+
+    def write_text(self, pattern, start=1):
+        """ write one human-readable file per class, e.g. pattern='agLexicon_%d.txt' """
+        for label in range(self.n_labels):
+            with open(pattern % (label+start), 'w', encoding='UTF8') as f:
+                for phrase in self.phrases(label):
+                    f.write(phrase+'\n')
+
+    @classmethod
+    def read_text(cls, pattern, n_labels, start=1, min_len=3):
+        """ build a lexicon from per-class text files written by write_text() """
+        class_entries = []
+        for label in range(n_labels):
+            with open(pattern % (label+start), 'r', encoding='UTF8') as f:
+                class_entries.append(f.read().split('\n'))
+        lexicon = cls(n_labels, min_len)
+        lexicon.update(class_entries)
+        return lexicon
+
+
+def rank_entries(class_scores, size=50, cross_filter=False):
+    """ per-class phrases of a lexicon round from per-class {phrase: score} dicts
+
+    Keeps the `size` best-scored phrases of every class. With cross_filter, a
+    phrase is dropped when it overlaps (as a substring, either way) a phrase
+    of another class that scored higher.
+    """
+    ranked = [sorted(scores.items(), key=lambda x: x[1], reverse=True)[:size] for scores in class_scores]
+    if not cross_filter:
+        return [[phrase for phrase, _ in entries] for entries in ranked]
+
+    lowered = [[(phrase.lower(), score) for phrase, score in entries] for entries in ranked]
+    class_entries = []
+    for label, entries in enumerate(lowered):
+        others = [x for other in range(len(lowered)) if other != label for x in lowered[other]]
+        class_entries.append([ranked[label][i][0] for i, (phrase, score) in enumerate(entries)
+                              if not any((phrase in p or p in phrase) and score < s for p, s in others)])
+    return class_entries
+
+
+class LexiconMatcher(object):
+    """ Count per-class lexicon matches of a sentence in a single pass over its words
+
+    An entry matches a sentence when exactly `t` of its words match (t = 3, 4),
+    a lexicon word w matching a sentence word iw if w is a substring of iw and
+    len(w) >= len(iw)-slack. The matching lexicon words of a sentence word are
+    therefore among its substrings of length len(iw)-slack or more, which are
+    looked up once per distinct sentence word and cached.
+    """
+    def __init__(self, lexicon, thresholds=(3, 4), slack=3):
+        self.version = lexicon.version
+        self.n_labels = lexicon.n_labels
+        self.thresholds = tuple(thresholds)
+        self.slack = slack
+
+        self.entry_labels = []
+        self.index = defaultdict(list) # lexicon word id -> entries (repeated per occurrence)
+        for label, entries in enumerate(lexicon.entries):
+            for entry in entries:
+                for idx in entry:
+                    self.index[idx].append(len(self.entry_labels))
+                self.entry_labels.append(label)
+        self.lex_words = {lexicon.words[idx]: idx for idx in self.index}
+        self.max_word_len = max((len(w) for w in self.lex_words), default=0)
+        self.table = {} # sentence word -> matching lexicon word ids
+
+    def lookup(self, word):
+        "ids of the lexicon words matching a sentence word"
+        ids = self.table.get(word)
+        if ids is None:
+            found = set()
+            n = len(word)
+            for length in range(max(n-self.slack, 1), min(n, self.max_word_len)+1):
+                for start in range(0, n-length+1):
+                    idx = self.lex_words.get(word[start:start+length])
+                    if idx is not None:
+                        found.add(idx)
+            ids = self.table[word] = tuple(found)
+        return ids
+
+    def count(self, words):
+        """ per-class match counts of a list of sentence words, shape (len(thresholds), n_labels) """
+        hits = set()
+        for word in set(words):
+            hits.update(self.lookup(word))
+
+        per_entry = defaultdict(int)
+        for idx in hits:
+            for entry in self.index[idx]:
+                per_entry[entry] += 1
+
+        counts = np.zeros((len(self.thresholds), self.n_labels), dtype=np.int64)
+        for entry, n in per_entry.items():
+            for k, t in enumerate(self.thresholds):
+                if n == t:
+                    counts[k, self.entry_labels[entry]] += 1
+        return counts
+
+    def count_sentence(self, sentence):
+        "per-class match counts of a raw sentence"
+        return self.count(match_words(sentence))
+
+
+class PoolIncidence(object):
+    """ Binary sentence x word incidence matrix of the unlabeled pool (built once per pool) """
+    def __init__(self, words, indices, indptr):
+        self.words = words
+        self.matrix = sp.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                                    shape=(len(indptr)-1, len(words)))
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @classmethod
+    def from_texts(cls, texts):
+        vocab = {}
+        indptr, indices = [0], []
+        for text in texts:
+            indices.extend(sorted({vocab.setdefault(word, len(vocab)) for word in match_words(text)}))
+            indptr.append(len(indices))
+        return cls(list(vocab), indices, indptr)
+
+    @classmethod
+    def from_pool(cls, pool):
+        "from the match-word ids a pool.PoolWords computed at ingest"
+        return cls(pool.words, pool.match, pool.match_offsets)
+
+
+def score_pool(incidence, lexicon, thresholds=(3, 4)):
+    """ per-class lexicon match counts of every pool sentence, shape (len(thresholds), N, n_labels)
+
+    Same counts as LexiconMatcher.count, computed with three sparse products :
+    sentence x pool word, pool word x lexicon word (fuzzy rule), lexicon word x entry.
+    """
+    matcher = lexicon.matcher()
+    lex_cols = {idx: col for col, idx in enumerate(matcher.index)}
+    n_entries = len(matcher.entry_labels)
+
+    rows, cols = [], []
+    for v in np.unique(incidence.matrix.indices):
+        for idx in matcher.lookup(incidence.words[v]):
+            rows.append(v)
+            cols.append(lex_cols[idx])
+    fuzzy = sp.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                          shape=(incidence.matrix.shape[1], len(lex_cols)))
+
+    rows, cols = [], []
+    for idx, entries in matcher.index.items():
+        rows.extend([lex_cols[idx]]*len(entries))
+        cols.extend(entries)
+    entry_words = sp.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                shape=(len(lex_cols), n_entries)) # duplicates are summed
+
+    entry_labels = sp.csr_matrix((np.ones(n_entries, dtype=np.int32),
+                                  (np.arange(n_entries), matcher.entry_labels)),
+                                 shape=(n_entries, lexicon.n_labels))
+
+    hits = incidence.matrix @ fuzzy
+    hits.data[:] = 1 # lexicon words present in the sentence
+    matched = (hits @ entry_words).tocsr() # matched words per entry
+
+    counts = np.zeros((len(thresholds), len(incidence), lexicon.n_labels), dtype=np.int16)
+    for k, t in enumerate(thresholds):
+        exact = matched.copy()
+        exact.data = (exact.data == t).astype(np.int32)
+        exact.eliminate_zeros()
+        counts[k] = (exact @ entry_labels).toarray()
+    return counts
@@ -0,0 +1,209 @@
+""" Unlabeled pool : sentences stored and normalized once at ingest """
+
+import csv
+
+import numpy as np
+
+from lexicon import match_words
+
+
+LEX_PUNCT = ".,'!?\""
+
+def lex_form(word):
+    "word as stored in lexicon entries (punctuation stripped, lower-cased)"
+    for c in LEX_PUNCT:
+        word = word.replace(c, "")
+    return word.lower()
+
+
+def _ragged(lists):
+    "flat int32 array and int64 offsets of a list of id lists"
+    offsets = np.zeros(len(lists)+1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(x) for x in lists])
+    flat = np.fromiter((i for x in lists for i in x), dtype=np.int32, count=int(offsets[-1]))
+    return flat, offsets
+
+
+class TextArena(object):
+    """ Sentences of the pool as one UTF-8 byte buffer with int64 offsets, decoded on access """
+    def __init__(self, data, offsets):
+        self.data = data # uint8
+        self.offsets = offsets
+
+    @classmethod
+    def from_texts(cls, texts):
+        buf = bytearray()
+        offsets = [0]
+        for text in texts:
+            buf += text.encode('utf-8')
+            offsets.append(len(buf))
+        return cls(np.frombuffer(buf, dtype=np.uint8), np.array(offsets, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.offsets)-1
+
+    def __getitem__(self, row):
+        return self.data[self.offsets[row]:self.offsets[row+1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+
+def read_pool(file, max_words=None):
+    """ texts (as a TextArena) and labels of a label<TAB>text file
+
+    A text is its words each followed by a space, cut to max_words words if given.
+    Rows with an empty label or text are skipped, as the datasets skip them.
+    """
+    labels = []
+    def texts():
+        with open(file, "r", encoding='utf-8') as f:
+            for line in csv.reader(f, delimiter='\t'):
+                if(line[0]=="" or line[1]==""):
+                    continue
+                labels.append(int(line[0]))
+                words = line[1].split(' ')
+                if max_words is not None:
+                    words = words[:max_words]
+                yield ' '.join(words)+' '
+    arena = TextArena.from_texts(texts())
+    return arena, np.array(labels, dtype=np.int8)
+
+
+class PoolWords(object):
+    """ Word-id views of every pool sentence over one shared vocabulary
+
+    tokens : tokenizer output (attention positions index into it)
+    raw    : sentence.split(' ') lower-cased, in order (lexicon mining)
+    match  : sorted unique ids of lexicon.match_words(sentence) (lexicon matching)
+    Per-word normalizations are cached at vocabulary level, so no string
+    processing is repeated over the pool between rounds.
+    """
+    def __init__(self):
+        self.vocab = {}
+        self.words = []
+        self._lex_ids = {} # vocab id -> vocab id of lex_form(word)
+
+    def _id(self, word):
+        idx = self.vocab.get(word)
+        if idx is None:
+            idx = self.vocab[word] = len(self.words)
+            self.words.append(word)
+        return idx
+
+    @classmethod
+    def build(cls, texts, tokenize):
+        pool = cls()
+        tokens, raw, match = [], [], []
+        for text in texts:
+            tokens.append([pool._id(t) for t in tokenize(text)])
+            raw.append([pool._id(w.lower()) for w in text.split(' ')])
+            match.append(sorted({pool._id(w) for w in match_words(text)}))
+        pool.tokens, pool.tokens_offsets = _ragged(tokens)
+        pool.raw, pool.raw_offsets = _ragged(raw)
+        pool.match, pool.match_offsets = _ragged(match)
+        return pool
+
+    def __len__(self):
+        return len(self.match_offsets)-1
+
+    def _row(self, flat, offsets, row):
+        return flat[offsets[row]:offsets[row+1]]
+
+    def n_tokens(self, row):
+        return int(self.tokens_offsets[row+1]-self.tokens_offsets[row])
+
+    def match_words(self, row):
+        return [self.words[i] for i in self._row(self.match, self.match_offsets, row)]
+
+    def lex_id(self, idx):
+        lex = self._lex_ids.get(idx)
+        if lex is None:
+            lex = self._lex_ids[idx] = self._id(lex_form(self.words[idx]))
+        return lex
+
+    def lexicon_entry(self, row, positions, stopwords, min_words=3):
+        """ lexicon entry mined from the tokens at attention `positions`, None if too short
+
+        Every attended token (punctuation stripped, not a stop word, 2+ chars)
+        picks the first sentence word containing it; the entry is the unique
+        picked words in order of first appearance (for display : an entry is
+        identified by its word set).
+        """
+        tokens = self._row(self.tokens, self.tokens_offsets, row)
+        raw = self._row(self.raw, self.raw_offsets, row)
+        entry = []
+        for j in positions:
+            if j >= len(tokens):
+                continue
+            token = self.words[self.lex_id(tokens[j])]
+            if token in stopwords or len(token) < 2:
+                continue
+            for idx in raw:
+                if token in self.words[idx]:
+                    word = self.words[self.lex_id(idx)]
+                    if word not in entry:
+                        entry.append(word)
+                    break
+        if len(entry) < min_words:
+            return None
+        return entry
+
+
+class PoolState(object):
+    """ Per-row labeling state of the pool as flat arrays (row ids index into them)
+
+    selected     : row has been given a pseudo label and left the pool
+    pseudo_label : label it was given, -1 if not selected
+    gold         : label from the data file (statistics only)
+    candidate    : label proposed in the current round, -1 if rejected
+    candidate_rule, candidate_conf : pseudo_label.RULE_* that proposed it and its confidence
+    loader_rows  : pool rows the current pool loader yields
+    """
+    def __init__(self, gold):
+        self.gold = np.asarray(gold, dtype=np.int8)
+        n = len(self.gold)
+        self.selected = np.zeros(n, dtype=bool)
+        self.pseudo_label = np.full(n, -1, dtype=np.int8)
+        self.candidate = np.full(n, -1, dtype=np.int8)
+        self.candidate_rule = np.zeros(n, dtype=np.uint8)
+        self.candidate_conf = np.zeros(n, dtype=np.float32)
+        self.loader_rows = np.arange(n)
+
+    def __len__(self):
+        return len(self.gold)
+
+    def candidate_counts(self, n_labels):
+        return np.bincount(self.candidate[self.candidate >= 0], minlength=n_labels)
+
+    def restore(self, records):
+        "selection state after the given ledger records (e.g. after Ledger.rollback)"
+        self.selected[:] = False
+        self.pseudo_label[:] = -1
+        self.selected[records['row']] = True
+        self.pseudo_label[records['row']] = records['label']
+
+
+def select_balanced(state, n_labels, balance=min):
+    """ select the same number of unselected candidates per class, at random
+
+    The per-class quota is balance() of the class candidate counts (min, or max
+    to take every candidate). Candidates are shuffled once and stably sorted by
+    label, so every class block is a random permutation and its first `quota`
+    rows are taken. Returns the newly selected rows in ascending order.
+    """
+    cand = np.flatnonzero((state.candidate >= 0) & ~state.selected)
+    cand = cand[np.random.permutation(len(cand))]
+    labels = state.candidate[cand]
+    cand = cand[np.argsort(labels, kind='stable')]
+
+    counts = np.bincount(labels, minlength=n_labels)
+    quota = balance(counts)
+    starts = np.cumsum(counts)-counts
+    rank = np.arange(len(cand))-np.repeat(starts, counts)
+    rows = np.sort(cand[rank < quota])
+
+    state.selected[rows] = True
+    state.pseudo_label[rows] = state.candidate[rows]
+    return rows
@@ -0,0 +1,167 @@
+""" Trial scheduler : the random-split trials of several datasets, run in parallel worker processes
+
+    python scheduler.py --datasets=AGNews,IMDB --workers=4 --mem_gb=12
+
+Every (dataset, trial) task runs bootstrap.main(dataset, trials=[trial]) in its
+own process, pinned to its own share of the cores (and device, if given), in
+its own run directory <runs_dir>/<dataset>/trial<k>/ : the split files, ledger,
+checkpoints, lexicons and result files of parallel trials never clobber each
+other. The word vectors are saved once in gensim's native format and
+memory-mapped by every worker (see tokenization.SHARED_EMBEDDINGS). A failed
+trial is logged and the others go on; <runs_dir>/summary.tsv lists them all.
+"""
+
+import csv
+import inspect
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import resource
+import sys
+import time
+import traceback
+
+import fire
+
+
+def split_cores(cores, n_slots):
+    "split a set of core ids into n_slots lists of contiguous ids (shared round-robin if fewer cores)"
+    cores = sorted(cores)
+    if len(cores) < n_slots:
+        return [[cores[i % len(cores)]] for i in range(n_slots)]
+    size, extra = divmod(len(cores), n_slots)
+    slots, start = [], 0
+    for i in range(n_slots):
+        end = start + size + (i < extra)
+        slots.append(cores[start:end])
+        start = end
+    return slots
+
+
+def absolute_paths(kwargs):
+    "kwargs with the relative paths (existing files or files of existing directories) made absolute"
+    out = {}
+    for key, value in kwargs.items():
+        if isinstance(value, str) and '/' in value and \
+                (os.path.exists(value) or os.path.isdir(os.path.dirname(value))):
+            value = os.path.abspath(value)
+        out[key] = value
+    return out
+
+
+def prepare_run_dir(out_dir, spec, total_data):
+    "the directories bootstrap.main writes to, relative to the run directory"
+    for name in ['data', 'temp_data', 'result', 'model_save', spec.tag + '_model_save',
+                 spec.name + '_model_save', os.path.dirname(spec.lexicon_file)]:
+        os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+    link = os.path.join(out_dir, 'total_data')
+    if not os.path.lexists(link):
+        os.symlink(total_data, link)
+
+
+def run_trial(dataName, trial, out_dir, cores, device, train_cfg, mem_gb, main_kwargs):
+    "worker process : one trial of one dataset in out_dir, output in out_dir/log.txt"
+    if mem_gb: # private writable memory : the read-only mapped word vectors are not charged
+        limit = int(mem_gb * 2**30)
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+    log = open(os.path.join(out_dir, 'log.txt'), 'a', buffering=1)
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    sys.stdout = sys.stderr = log
+
+    import bootstrap # sys.path is still the one of the scheduler
+
+    cfg = json.load(open(train_cfg, "r"))
+    cfg.update(cpu_cores=','.join(map(str, cores)), cpu_threads=len(cores))
+    if device:
+        cfg['device'] = device
+    os.chdir(out_dir)
+    json.dump(cfg, open('train_cfg.json', 'w'), indent=4)
+    try:
+        bootstrap.main(dataName, train_cfg='train_cfg.json', trials=[trial], **main_kwargs)
+    except BaseException:
+        traceback.print_exc()
+        log.flush()
+        os._exit(1)
+
+
+def main(datasets='AGNews',
+         trials='0,1,2,3,4',
+         workers=None,
+         runs_dir='./runs',
+         train_cfg='config/train_mrpc.json',
+         mem_gb=0,
+         devices='',
+         **main_kwargs):
+    """ run every trial of every dataset (comma separated lists) on `workers` processes
+
+    The cores this process may run on are split between the workers; devices
+    (e.g. 'cuda:0,cuda:1') are given to the workers round-robin. mem_gb caps
+    the private memory of each worker. Other keyword arguments go to
+    bootstrap.main.
+    """
+    datasets = datasets.split(',') if isinstance(datasets, str) else list(datasets)
+    trials = [int(t) for t in str(trials).split(',')] if isinstance(trials, (str, int)) else list(trials)
+    tasks = [(name, t) for name in datasets for t in trials]
+    cores = os.sched_getaffinity(0)
+    workers = workers or min(len(tasks), len(cores))
+    slots = split_cores(cores, workers)
+    devices = devices.split(',') if devices else [None]
+    runs_dir = os.path.abspath(runs_dir)
+    os.makedirs(runs_dir, exist_ok=True)
+
+    # the word vectors : saved once in a mappable format, before any worker loads them
+    os.environ['SALNET_SHARED_EMBEDDINGS'] = os.path.join(runs_dir, 'embeddings.kv')
+    import bootstrap
+    bootstrap.tokenization.load_embeddings() # read once and saved
+    # path defaults of bootstrap.main too : the workers run in their own directories
+    defaults = dict((key, param.default) for key, param in inspect.signature(bootstrap.main).parameters.items()
+                    if isinstance(param.default, str) and key != 'train_cfg')
+    defaults.update(main_kwargs)
+    main_kwargs = absolute_paths(defaults)
+    main_kwargs.pop('trials', None)
+    train_cfg = os.path.abspath(train_cfg)
+    total_data = os.path.abspath('./total_data')
+
+    context = multiprocessing.get_context('spawn') # no CUDA / thread pool state inherited
+    free = list(range(workers))
+    running = {} # slot -> (process, dataset, trial, out_dir, start time)
+    results = []
+    pending = list(tasks)
+    while pending or running:
+        while pending and free:
+            slot = free.pop(0)
+            dataName, trial = pending.pop(0)
+            spec = bootstrap.dataset_spec(dataName)
+            out_dir = os.path.join(runs_dir, spec.name, 'trial%d' % (trial+1))
+            prepare_run_dir(out_dir, spec, total_data)
+            process = context.Process(target=run_trial, name='%s-trial%d' % (spec.name, trial+1),
+                                      args=(dataName, trial, out_dir, slots[slot], devices[slot % len(devices)],
+                                            train_cfg, mem_gb, main_kwargs))
+            process.start()
+            print('%s trial %d : started on cores %s' % (spec.name, trial+1, ','.join(map(str, slots[slot]))))
+            running[slot] = (process, spec.name, trial, out_dir, time.time())
+
+        multiprocessing.connection.wait([p.sentinel for p, *_ in running.values()])
+        for slot, (process, name, trial, out_dir, start) in list(running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            status = 'ok' if process.exitcode == 0 else 'failed (exit code %d)' % process.exitcode
+            print('%s trial %d : %s in %.1fs, see %s' % (name, trial+1, status, time.time()-start,
+                                                         os.path.join(out_dir, 'log.txt')))
+            results.append((name, trial+1, status, '%.1f' % (time.time()-start), out_dir))
+            del running[slot]
+            free.append(slot)
+
+    with open(os.path.join(runs_dir, 'summary.tsv'), 'w', encoding='utf-8', newline='') as f:
+        w = csv.writer(f, delimiter='\t')
+        w.writerow(['dataset', 'trial', 'status', 'seconds', 'run_dir'])
+        w.writerows(sorted(results))
+    failed = sum(1 for r in results if r[2] != 'ok')
+    print('%d trials, %d failed : %s' % (len(results), failed, os.path.join(runs_dir, 'summary.tsv')))
+
+
+if __name__ == '__main__':
+    fire.Fire(main)
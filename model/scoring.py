@@ -0,0 +1,79 @@
+""" Pool scores : outputs of both models over the unlabeled pool, computed once per round """
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+NO_POSITION = np.iinfo(np.int16).max # top-k slot of a sentence shorter than k (or of a padded position)
+
+
+class PoolScores(object):
+    """ Per-row model outputs over the pool as flat arrays (row ids index into them)
+
+    pred1, conf1 : argmax and max probability of the CNN
+    pred2, conf2 : argmax and max probability of the LSTM
+    logit2       : max raw logit of the LSTM (weight of a mined lexicon entry)
+    attn_pos, attn_max : argmax and max of the LSTM attention
+    attn_topk    : positions of the `topk` largest LSTM attention weights
+    scored       : row was scored in the current round
+    Lexicon mining and pseudo labeling both read these arrays, so the
+    models run over the pool once per bootstrap round.
+    """
+    def __init__(self, n_rows, topk=4):
+        self.topk = topk
+        self.pred1 = np.zeros(n_rows, dtype=np.int16)
+        self.conf1 = np.zeros(n_rows, dtype=np.float32)
+        self.pred2 = np.zeros(n_rows, dtype=np.int16)
+        self.conf2 = np.zeros(n_rows, dtype=np.float32)
+        self.logit2 = np.zeros(n_rows, dtype=np.float32)
+        self.attn_pos = np.zeros(n_rows, dtype=np.int16)
+        self.attn_max = np.zeros(n_rows, dtype=np.float32)
+        self.attn_topk = np.full((n_rows, topk), NO_POSITION, dtype=np.int16)
+        self.scored = np.zeros(n_rows, dtype=bool)
+
+    def __len__(self):
+        return len(self.scored)
+
+    def reset(self):
+        self.scored[:] = False
+
+    def update(self, rows, logits, logits2, attention2):
+        """ store the outputs of one batch, `rows` being the pool rows of its sentences
+
+        logits, logits2 : (B, C) raw CNN and LSTM logits
+        attention2      : (B, T) LSTM attention weights
+        """
+        self.update_model1(rows, logits)
+        self.update_model2(rows, logits2, attention2)
+
+    def update_model1(self, rows, logits):
+        "store the first model outputs alone (batches of the models may hold different rows)"
+        conf1, pred1 = F.softmax(logits, 1).max(1)
+        self.pred1[rows] = pred1.cpu().numpy()
+        self.conf1[rows] = conf1.cpu().numpy()
+
+    def update_model2(self, rows, logits2, attention2):
+        "store the LSTM outputs alone, marking the rows scored"
+        if attention2.dim() == 1: # squeezed away for a single sentence
+            attention2 = attention2.unsqueeze(0)
+        conf2, pred2 = F.softmax(logits2, 1).max(1)
+        logit2 = logits2.max(1)[0]
+        attn_max, attn_pos = attention2.max(1)
+        k = min(self.topk, attention2.size(1))
+        weights, attn_topk = torch.topk(attention2, k)
+        attn_topk = attn_topk.masked_fill(weights == 0, NO_POSITION) # padded positions of a short sentence
+
+        self.pred2[rows] = pred2.cpu().numpy()
+        self.conf2[rows] = conf2.cpu().numpy()
+        self.logit2[rows] = logit2.cpu().numpy()
+        self.attn_pos[rows] = attn_pos.cpu().numpy()
+        self.attn_max[rows] = attn_max.cpu().numpy()
+        self.attn_topk[rows] = NO_POSITION
+        self.attn_topk[rows, :k] = attn_topk.cpu().numpy()
+        self.scored[rows] = True
+
+    def predictions(self, rows):
+        "pred1, conf1, pred2, conf2 of the given rows as tensors, as pseudo_label.decide_labels takes them"
+        return (torch.from_numpy(self.pred1[rows]).long(), torch.from_numpy(self.conf1[rows]),
+                torch.from_numpy(self.pred2[rows]).long(), torch.from_numpy(self.conf2[rows]))
@@ -0,0 +1,105 @@
+""" Content-addressed cache of the pure pipeline stages : split, tokenized sets, embedding, round-0 models """
+
+import hashlib
+import os
+import time
+from typing import NamedTuple, Any
+
+import torch
+
+
+STAGE_VERSION = 1 # bump when a stage computes something else from the same inputs
+
+
+class Artifact(NamedTuple):
+    """ Output of a stage (or an input file), addressed by the hash of what it was computed from """
+    key: str
+    value: Any
+    cached: bool = False # loaded from the cache, not computed
+
+
+class Entry(object):
+    """ Cache slot of one stage key : <root>/<stage>/<key>.pt """
+    def __init__(self, file, key):
+        self.file = file
+        self.key = key
+
+    def exists(self):
+        return os.path.exists(self.file)
+
+    def load(self):
+        return torch.load(self.file, map_location='cpu')
+
+    def save(self, value):
+        os.makedirs(os.path.dirname(self.file), exist_ok=True)
+        tmp = self.file + '.tmp'
+        torch.save(value, tmp)
+        os.replace(tmp, self.file)
+
+
+class ArtifactCache(object):
+    """ Stage outputs stored under the hash of their inputs and config
+
+    A stage key hashes the stage name, its plain config values and the keys
+    of its input artifacts, so the key of an upstream artifact flows into
+    every stage computed from it : changing an input or a config value
+    reruns that stage and everything downstream, and nothing else. Input
+    files are artifacts keyed by their content (or, for large files, by
+    path, size and modification time). Values are tensors, lists and dicts.
+    With root "" the cache is off : stages are always computed.
+    """
+    def __init__(self, root=""):
+        self.root = root
+        self.hits = []
+        self.misses = []
+
+    def file(self, path, stamp=False):
+        "an input file as an artifact (value : the path)"
+        if not self.root:
+            return Artifact(None, path, True)
+        digest = hashlib.sha1()
+        if stamp: # too large to read : identity of the file
+            info = os.stat(path)
+            digest.update(repr((os.path.abspath(path), info.st_size, info.st_mtime_ns)).encode('utf-8'))
+        else:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return Artifact(digest.hexdigest(), path, True)
+
+    def key(self, stage, *inputs):
+        digest = hashlib.sha1(repr((stage, STAGE_VERSION)).encode('utf-8'))
+        for x in inputs:
+            digest.update(repr(x.key if isinstance(x, Artifact) else x).encode('utf-8'))
+        return digest.hexdigest()
+
+    def entry(self, stage, *inputs):
+        "the cache slot of a stage, for stages run inline (None with the cache off)"
+        if not self.root:
+            return None
+        key = self.key(stage, *inputs)
+        return Entry(os.path.join(self.root, stage, key + '.pt'), key)
+
+    def stage(self, stage, compute, *inputs):
+        """ Artifact of compute(), loaded from the cache when a run with the same inputs stored it
+
+        inputs are artifacts (upstream stages, files) or plain config values.
+        """
+        entry = self.entry(stage, *inputs)
+        if entry is None:
+            return Artifact(None, compute())
+        start = time.time()
+        if entry.exists():
+            value = entry.load()
+            self.hits.append('%s %.1fs' % (stage, time.time()-start))
+            return Artifact(entry.key, value, True)
+        value = compute()
+        entry.save(value)
+        self.misses.append('%s %.1fs' % (stage, time.time()-start))
+        return Artifact(entry.key, value)
+
+    def report(self):
+        if self.root:
+            print("artifact cache %s : %d stages loaded (%s), %d computed (%s)" % (
+                self.root, len(self.hits), ', '.join(self.hits), len(self.misses), ', '.join(self.misses)))
+        self.hits, self.misses = [], []
@@ -2,6 +2,7 @@
 
 import os
 import json
+import time
 from typing import NamedTuple
 from tqdm import tqdm
 
@@ -14,23 +15,102 @@ import torch.nn.functional as F
 from sklearn.metrics import precision_score, recall_score,f1_score, accuracy_score
 from random import randint
 from pytorchtools import EarlyStopping
+from checkpoint_writer import CheckpointWriter
+
+
+ROUND0_PATIENCE = 30 # early stopping patience of the round-0 supervised fits
+
+# Config fields that change how fast a run trains, not what it trains (left out of the round-0 cache key)
+RUNTIME_FIELDS = ('device', 'cpu_threads', 'cpu_interop_threads', 'cpu_cores', 'progress_interval',
+                  'checkpoint_queue', 'artifact_cache', 'phase_snapshots', 'infer_batch_size')
 
 
 class Config(NamedTuple):
     """ Hyperparameters for training """
     seed: int = 3431 # random seed
     batch_size: int = 128
+    infer_batch_size: int = 128 # batches of the unlabeled pool (inference only : the scores of a row do not depend on its batch)
     lr: int = 1e-3 # learning rate
     n_epochs: int = 100 # the number of epoch
     warmup: float = 0.1
     save_steps: int = 100 # interval for saving model
     total_steps: int = 100000 # total number of steps to train
+    device: str = "" # 'cpu', 'cuda', 'cuda:1'... ("" : GPU if available)
+    cpu_threads: int = 0 # intra-op threads (0 : torch default)
+    cpu_interop_threads: int = 0 # inter-op threads (0 : torch default)
+    cpu_cores: str = "" # pin the process to these cores, e.g. '0-7' ("" : no pinning)
+    progress_interval: float = 1.0 # seconds between progress bar loss updates
+    best_in_memory: bool = True # early stopping keeps the best weights in memory, written once per phase
+    concurrent_training: bool = False # retrain the CNN and the LSTM together, one pass over the data per epoch
+    checkpoint_queue: int = 2 # checkpoint writes queued on a background thread before training waits (0 : write in the loop)
+    artifact_cache: str = "" # directory of the stage cache (see stages.ArtifactCache, "" : off)
+    incremental_rounds: bool = False # later rounds go on from the last weights, on the round's new pseudo labels plus a replay sample
+    replay_size: int = 1000 # older rows (labeled and earlier pseudo labels) replayed in an incremental round
+    rows_per_epoch: int = 1000 # epoch budget of an incremental round : one epoch per rows_per_epoch new rows (at least one)
+    phase_snapshots: bool = True # rewrite ./temp_data/resume_<tag>_<trial>.pt after every phase (needed by resume)
 
     @classmethod
     def from_json(cls, file): # load config from json file
         return cls(**json.load(open(file, "r")))
 
 
+class RunningMetrics(object):
+    """ Running sums of a loop kept on the device : batch losses, correct predictions, samples
+
+    add() queues device ops only, so a step does not wait for the host. The
+    sums are read (one host sync) when the loop ends, e.g. once per epoch.
+    """
+    def __init__(self, device):
+        self.loss_sum = torch.zeros((), device=device) # sum of batch losses
+        self.sample_loss_sum = torch.zeros((), device=device) # sum of batch losses times batch size
+        self.correct = torch.zeros((), dtype=torch.long, device=device)
+        self.steps = 0
+        self.samples = 0
+
+    def add(self, loss, outputs=None, targets=None):
+        loss = loss.detach()
+        self.loss_sum += loss
+        self.steps += 1
+        if targets is not None:
+            self.sample_loss_sum += loss * targets.size(0)
+            self.samples += targets.size(0)
+            self.correct += (outputs.detach().argmax(1) == targets).sum()
+
+    def average_loss(self):
+        "mean of the batch losses"
+        return self.loss_sum.item()/max(self.steps, 1)
+
+    def sample_loss(self):
+        "mean loss per sample"
+        return self.sample_loss_sum.item()/max(self.samples, 1)
+
+    def accuracy(self):
+        return self.correct.item()/max(self.samples, 1)
+
+
+class Progress(object):
+    """ tqdm bar whose loss description is refreshed at most every `interval` seconds
+
+    Reading the loss is a host sync, so it only happens on a refresh.
+    """
+    def __init__(self, iterable, interval=1.0, desc='Iter (loss=X.XXX)', **kwargs):
+        self.bar = tqdm(iterable, desc=desc, **kwargs)
+        self.interval = interval
+        self.last = time.time()
+
+    def __iter__(self):
+        return iter(self.bar)
+
+    def __len__(self):
+        return len(self.bar)
+
+    def report(self, loss):
+        now = time.time()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.bar.set_description('Iter (loss=%5.3f)'%loss.item())
+
+
 class Trainer(object):
     """Training Helper Class"""
     def __init__(self, cfg, dataName,stopNum,model,model2, data_iter,data_iter2, data_iter3,dataset_dev, optimizer, optimizer2, device, kkk):
@@ -47,12 +127,34 @@ class Trainer(object):
         self.optimizer = optimizer
         self.optimizer2 =optimizer2
         self.device = device # device name
+        self.writer = CheckpointWriter(cfg.checkpoint_queue) if cfg.checkpoint_queue else None
         self.kkk = kkk
 
     
-    def train(self, get_loss_CNN, get_loss_Attn_LSTM, evalute_CNN_SSL, pseudo_labeling,evalute_Attn_LSTM,evalute_CNN,evalute_Attn_LSTM_SSL, generating_lexiocn, data_parallel=True):
+    def train(self, get_loss_CNN, get_loss_Attn_LSTM, evalute_CNN_SSL, pseudo_labeling, evalute_Attn_LSTM_SSL, generating_lexiocn, data_parallel=True, score_unlabeled=None, get_joint_loss=None,
+              snapshot=None, resume=False, round0=None):
      
-        """ Train Loop """
+        """ Train Loop
+
+        If score_unlabeled is given, every odd epoch runs it once over the pool
+        (storing the model outputs), then generating_lexiocn(e) and
+        pseudo_labeling(e) run from the stored outputs. Otherwise both
+        run their own pass over the pool.
+
+        With Config.concurrent_training and get_joint_loss given, the two
+        models are retrained together in every later even epoch (see
+        fit_together).
+
+        With Config.incremental_rounds, the retraining rounds go on from the
+        weights of the last round for an epoch budget set by the size of the
+        round (see round_epochs) : data_iter_temp then holds the round's new
+        pseudo labels and a replay sample of older rows (ledger.RoundSet).
+
+        If snapshot (a resume.RunSnapshot) is given, it is rewritten after
+        every phase, and resume=True restarts from its last completed phase.
+        If round0 (a stages.Entry) holds the state of round-0 models trained
+        on the same data, they are loaded instead of trained, else stored.
+        """
         self.model.train() # train mode
         self.model2.train() # train mode
         model = self.model.to(self.device)
@@ -79,6 +181,11 @@ class Trainer(object):
             cnn_save_name = "./yahoo_model_save/checkpoint_CNN"+str(t)+".pt"
             result_name = "./result/result_yahoo.txt"
             pseudo_name = "./result/pseudo_train_set_yahoo.txt"
+        else: # any other registered dataset
+            rnn_save_name = "./"+self.dataName+"_model_save/checkpoint_RNN"+str(t)+".pt"
+            cnn_save_name = "./"+self.dataName+"_model_save/checkpoint_CNN"+str(t)+".pt"
+            result_name = "./result/result_"+self.dataName+".txt"
+            pseudo_name = "./result/pseudo_train_set_"+self.dataName+".txt"
 
         
         
@@ -89,119 +196,118 @@ class Trainer(object):
         before = -50
         curTemp=0
         print("self.cfg.n_epochs#:", self.cfg.n_epochs)
-        ddf = open(result_name,'a', encoding='UTF8')
-        ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
-        ddf.close()
-        
-        ddf = open(pseudo_name,'a', encoding='UTF8')
-        ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
-        ddf.close()
+        start, done = 0, None # epoch to start from, phase of it already done
+        if resume:
+            start, done, counters, loaders = snapshot.load(self)
+            num_a, curTemp = counters['num_a'], counters['curTemp']
+            self.data_iter_temp, self.data_iter = loaders
+        else:
+            ddf = open(result_name,'a', encoding='UTF8')
+            ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
+            ddf.close()
+
+            ddf = open(pseudo_name,'a', encoding='UTF8')
+            ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
+            ddf.close()
                 
-        for e in range(self.cfg.n_epochs):
+        for e in range(start, self.cfg.n_epochs):
+            skip, done = done, None # phase of a resumed epoch already done
             if(e==0):
-                temp=987654321
-                early_stopping = EarlyStopping(patience=30, verbose=True)
-                valid_losses = []
+                time_saved = 0. # checkpoint I/O saved by in-memory early stopping this round
+                if skip is None and round0 is not None and round0.exists(): # round-0 models of an earlier run
+                    self.load_state_dict(round0.load())
+                    self._save(model2.state_dict(), "./model_save/checkpoint_LSTM_real.pt")
+                    for m, forward, data_iter in ((model, evalute_CNN_SSL, self.data_iter2), (model2, evalute_Attn_LSTM_SSL, self.data_iter2)):
+                        metrics = self.evaluate(m, forward, data_iter)
+                        ddf = open(result_name,'a', encoding='UTF8')
+                        ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(metrics.accuracy())+'\n')
+                        ddf.close()
+                        num_a+=1
+                    self.flush()
+                    self._snapshot(snapshot, e, 'lstm', num_a, curTemp)
+                    continue
+                if skip != 'cnn':
+                    temp=987654321
+                    early_stopping = EarlyStopping(patience=ROUND0_PATIENCE, verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
                 
-                while(1):
-                    model.train()
-                    loss_sum = 0.
-                    global_step3 = 0
-                    iter_bar3 = tqdm(self.data_iter3, desc='Iter (loss=X.XXX)')
-                    for i, batch in enumerate(iter_bar3):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
-                        self.optimizer.zero_grad()
-                        loss.backward()
-                        self.optimizer.step()
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar3.set_description('Iter (loss=%5.3f)'%loss.item())
+                    while(1):
+                        model.train()
+                        metrics = RunningMetrics(self.device)
+                        global_step3 = 0
+                        iter_bar3 = Progress(self.data_iter3, self.cfg.progress_interval)
+                        for i, batch in enumerate(iter_bar3):
+                            batch = [t.to(self.device) for t in batch]
+                            loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
+                            self.optimizer.zero_grad()
+                            loss.backward()
+                            self.optimizer.step()
+                            global_step3 += 1
+                            metrics.add(loss)
+                            iter_bar3.report(loss)
                         
-                        if global_step3 % self.cfg.save_steps == 0: # save
-                            self.save(global_step3)
-
-                        if self.cfg.total_steps and self.cfg.total_steps < global_step3:
-                            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                            print('The Total Steps have been reached.')
-                            self.save(global_step3) # save and finish when global_steps reach total_steps
-                            return
-
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    model.eval()
-                    loss_sum = 0.
-                    global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev, desc='Iter (loss=X.XXX)')
-                    for i, batch in enumerate(iter_bar_dev):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
-
-                        if global_step3 % self.cfg.save_steps == 0: # save
-                            self.save(global_step3)
-
-                        if self.cfg.total_steps and self.cfg.total_steps < global_step3:
-                            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                            print('The Total Steps have been reached.')
-                            self.save(global_step3) # save and finish when global_steps reach total_steps
-                            return
-
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    valid_loss = np.average(valid_losses)
-                    loss_min=early_stopping(valid_loss, model,"./model_save/checkpoint_CNN_real.pt")
-                    valid_losses = []
-
-                    if early_stopping.early_stop:
-                        print("Early stopping")
-                        break
+                            if global_step3 % self.cfg.save_steps == 0: # save
+                                self.save(global_step3)
+
+                            if self.cfg.total_steps and self.cfg.total_steps < global_step3:
+                                print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                                print('The Total Steps have been reached.')
+                                self.save(global_step3) # save and finish when global_steps reach total_steps
+                                self.flush(close=True)
+                                return
+
+                        print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                        model.eval()
+                        metrics = RunningMetrics(self.device)
+                        global_step3 = 0
+                        iter_bar_dev = Progress(self.dataset_dev, self.cfg.progress_interval)
+                        for i, batch in enumerate(iter_bar_dev):
+                            batch = [t.to(self.device) for t in batch]
+                            loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
+                            global_step3 += 1
+                            metrics.add(loss)
+                            iter_bar_dev.report(loss)
+
+                            if global_step3 % self.cfg.save_steps == 0: # save
+                                self.save(global_step3)
+
+                            if self.cfg.total_steps and self.cfg.total_steps < global_step3:
+                                print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                                print('The Total Steps have been reached.')
+                                self.save(global_step3) # save and finish when global_steps reach total_steps
+                                self.flush(close=True)
+                                return
+
+                        print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                        valid_loss = metrics.average_loss()
+                        loss_min=early_stopping(valid_loss, model,"./model_save/checkpoint_CNN_real.pt")
+
+                        if early_stopping.early_stop:
+                            print("Early stopping")
+                            break
 
  
-                model.load_state_dict(torch.load("./model_save/checkpoint_CNN_real.pt"))
-                print("Early stopping")
-                model.eval()# evaluation mode
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                global_step3=0
-                
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                        targets, outputs =  evalute_CNN(model, batch,global_step3,len(iter_bar)) # accuracy to print
-                        loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                        
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
-                ddf = open(result_name,'a', encoding='UTF8')
-                ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
-                ddf.close()
-                num_a+=1
+                    early_stopping.restore(model)
+                    time_saved += early_stopping.time_saved
+                    print("Early stopping")
+                    model.eval()# evaluation mode
+                    metrics = self.evaluate(model, evalute_CNN_SSL, self.data_iter2)
+                    acc_total = metrics.accuracy()
+                    loss_total = metrics.sample_loss()
+                    ddf = open(result_name,'a', encoding='UTF8')
+                    ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
+                    ddf.close()
+                    num_a+=1
+                    self._snapshot(snapshot, e, 'cnn', num_a, curTemp)
                         
                 
                     
                 temp=987654321
-                early_stopping = EarlyStopping(patience=30, verbose=True)
-                valid_losses = []
+                early_stopping = EarlyStopping(patience=ROUND0_PATIENCE, verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
                 while(1):
                     model2.train()
-                    loss_sum = 0
+                    metrics = RunningMetrics(self.device)
                     global_step3 = 0
-                    iter_bar3 = tqdm(self.data_iter3, desc='Iter (loss=X.XXX)')
+                    iter_bar3 = Progress(self.data_iter3, self.cfg.progress_interval)
                     for i, batch in enumerate(iter_bar3):
                         batch = [t.to(self.device) for t in batch]
                         loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
@@ -209,104 +315,109 @@ class Trainer(object):
                         loss.backward()
                         self.optimizer2.step()
                         global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar3.set_description('Iter (loss=%5.3f)'%loss.item())
+                        metrics.add(loss)
+                        iter_bar3.report(loss)
 
                         if global_step3 % self.cfg.save_steps == 0: # save
                             self.save(global_step3)
 
                         if self.cfg.total_steps and self.cfg.total_steps < global_step3:
-                            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
+                            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
                             print('The Total Steps have been reached.')
                             self.save(global_step3) # save and finish when global_steps reach total_steps
+                            self.flush(close=True)
                             return
                         
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
+                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
                     model2.eval()
-                    loss_sum = 0.
+                    metrics = RunningMetrics(self.device)
                     global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev, desc='Iter (loss=X.XXX)')
+                    iter_bar_dev = Progress(self.dataset_dev, self.cfg.progress_interval)
                     for i, batch in enumerate(iter_bar_dev):
                         batch = [t.to(self.device) for t in batch]
                         loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
                         global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
+                        metrics.add(loss)
+                        iter_bar_dev.report(loss)
 
                         if global_step3 % self.cfg.save_steps == 0: # save
                             self.save(global_step3)
 
                         if self.cfg.total_steps and self.cfg.total_steps < global_step3:
-                            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
+                            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
                             print('The Total Steps have been reached.')
                             self.save(global_step3) # save and finish when global_steps reach total_steps
+                            self.flush(close=True)
                             return
 
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    valid_loss = np.average(valid_losses)
+                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                    valid_loss = metrics.average_loss()
                     loss_min=early_stopping(valid_loss, model2,"./model_save/checkpoint_LSTM_real.pt")
-                    valid_losses = []
                     if early_stopping.early_stop:
                         print("Early stopping")
                         break
 
+                early_stopping.persist()
+                time_saved += early_stopping.time_saved
+                if round0 is not None:
+                    round0.save(self.state_dict())
+
                     
                 model2.eval()# evaluation mode
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                global_step3=0
-                
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                        targets, outputs = evalute_Attn_LSTM(model2, batch, global_step3,len(iter_bar))# accuracy to print
-                        loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                print('total#####:', total_sample)
-                print("correct#:#", correct)
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
+                metrics = self.evaluate(model2, evalute_Attn_LSTM_SSL, self.data_iter2)
+                print('total#####:', metrics.samples)
+                print("correct#:#", metrics.correct.item())
+                acc_total = metrics.accuracy()
+                loss_total = metrics.sample_loss()
                 ddf = open(result_name,'a', encoding='UTF8')
                 ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
                 ddf.close()
                 num_a+=1
+                if self.cfg.best_in_memory:
+                    print('Epoch %d : about %.1fs of checkpoint I/O saved by in-memory early stopping'%(e+1, time_saved))
+                self.flush() # end of the round : every checkpoint is on disk
+                self._snapshot(snapshot, e, 'lstm', num_a, curTemp)
                 
             elif(e%2==1):
-                global_step1 = 0
-                model2.eval()
-                model.eval()
-                labell=[]
-                iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
-                for batch in iter_bar:
-                    batch = [t.to(self.device) for t in batch]
-                    with torch.no_grad(): # evaluation without gradient calculation
-                        label_id, y_pred1 = generating_lexiocn(model,model2, batch,global_step1,len(iter_bar),e) # accuracy to print
-                        global_step1+=1
+                if score_unlabeled is not None:
+                    sen = []
+                    if skip != 'lexicon':
+                        global_step1 = 0
+                        model2.eval()
+                        model.eval()
+                        iter_bar = tqdm(self.data_iter, desc='Iter (scoring)')
+                        for batch in iter_bar:
+                            batch = [t.to(self.device) for t in batch]
+                            with torch.no_grad(): # evaluation without gradient calculation
+                                score_unlabeled(model, model2, batch, global_step1, len(iter_bar), e)
+                                global_step1+=1
+
+                        generating_lexiocn(e)
+                        self._snapshot(snapshot, e, 'lexicon', num_a, curTemp)
+                    result_label,result3,data_temp,data_iter_temp_na = pseudo_labeling(e)
+                else:
+                    global_step1 = 0
+                    model2.eval()
+                    model.eval()
+                    labell=[]
+                    iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
+                    for batch in iter_bar:
+                        batch = [t.to(self.device) for t in batch]
+                        with torch.no_grad(): # evaluation without gradient calculation
+                            label_id, y_pred1 = generating_lexiocn(model,model2, batch,global_step1,len(iter_bar),e) # accuracy to print
+                            global_step1+=1
                 
-                global_step1 = 0
-                model.eval()
-                model2.eval()
-                sen = []
-                labell=[]
-                iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
-                for batch in iter_bar:
-                    batch = [t.to(self.device) for t in batch]
-                    with torch.no_grad(): # evaluation without gradient calculation
-                        label_id, y_pred1,result_label,result3,data_temp,data_iter_temp_na = pseudo_labeling(model, model2,batch,global_step1,len(iter_bar),e) # accuracy to print
-                        global_step1+=1
+                    global_step1 = 0
+                    model.eval()
+                    model2.eval()
+                    sen = []
+                    labell=[]
+                    iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
+                    for batch in iter_bar:
+                        batch = [t.to(self.device) for t in batch]
+                        with torch.no_grad(): # evaluation without gradient calculation
+                            label_id, y_pred1,result_label,result3,data_temp,data_iter_temp_na = pseudo_labeling(model, model2,batch,global_step1,len(iter_bar),e) # accuracy to print
+                            global_step1+=1
         
                 self.data_iter_temp = data_temp
                 self.data_iter = data_iter_temp_na
@@ -339,186 +450,250 @@ class Trainer(object):
                     curTemp=0
                 if(curTemp>=2):
                     break
+                self._snapshot(snapshot, e, 'pseudo_label', num_a, curTemp)
 
                     
 
             elif(e%2==0 ):
-                early_stopping = EarlyStopping(patience=10, verbose=True)
-                valid_losses = []
-                while(1):
-                    model.train()
-                    l=0
-                    l_sum=0
-                    loss_sum = 0.
-                    global_step3 = 0
-                    iter_bar3 = tqdm(self.data_iter_temp, desc='Iter (loss=X.XXX)')
-                    for i, batch in enumerate(iter_bar3):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
-                        self.optimizer.zero_grad()
-                        loss.backward()
-                        self.optimizer.step()
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar3.set_description('Iter (loss=%5.3f)'%loss.item())
-
-                    model.eval()
-                    loss_sum = 0.
-                    global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev, desc='Iter (loss=X.XXX)')
-                    for i, batch in enumerate(iter_bar_dev):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
-
-
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-
-                    valid_loss = np.average(valid_losses)
-                    loss_min=early_stopping(valid_loss, model,cnn_save_name)
-                    valid_losses = []
-
-                    if early_stopping.early_stop:
-                        print("Early stopping")
-                        break
-                model.load_state_dict(torch.load(cnn_save_name))
-                model.eval()# evaluation mode
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                global_step3=0
-                
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                        targets, outputs =  evalute_CNN(model, batch,global_step3,len(iter_bar)) # accuracy to print
-                        loss = get_loss_CNN(model, batch, global_step3).mean() # mean() for Data Parallelism
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                        
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
-                ddf = open(result_name,'a', encoding='UTF8')
-                ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
-                ddf.close()
-                num_a+=1
+                time_saved = 0. # checkpoint I/O saved by in-memory early stopping this round
+                concurrent = self.cfg.concurrent_training and get_joint_loss is not None
+                max_epochs = self.round_epochs(self.data_iter_temp)
+                if skip != 'cnn':
+                    if concurrent:
+                        time_saved += self.fit_together(e, model, model2, get_joint_loss, cnn_save_name, rnn_save_name,
+                                                      max_epochs=max_epochs)
+                    else:
+                        time_saved += self.fit(e, model, self.optimizer, get_loss_CNN, cnn_save_name, max_epochs=max_epochs)
+                    model.eval()# evaluation mode
+                    metrics = self.evaluate(model, evalute_CNN_SSL, self.data_iter2)
+                    acc_total = metrics.accuracy()
+                    loss_total = metrics.sample_loss()
+                    ddf = open(result_name,'a', encoding='UTF8')
+                    ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
+                    ddf.close()
+                    num_a+=1
+                    if not concurrent:
+                        self._snapshot(snapshot, e, 'cnn', num_a, curTemp)
                             
                  
-                valid_losses = []            
-                temp = 987654321
-                early_stopping = EarlyStopping(patience=10, verbose=True)
-                while(1):
-                    model2.train()
-                    l=0
-                    l_sum=0
-                    loss_sum = 0
-                    global_step3 = 0
-                    iter_bar3 = tqdm(self.data_iter_temp, desc='Iter (loss=X.XXX)')
-                    for i, batch in enumerate(iter_bar3):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
-                        self.optimizer2.zero_grad()
-                        loss.backward()
-                        self.optimizer2.step()
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar3.set_description('Iter (loss=%5.3f)'%loss.item())
-
-                     
-                        
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    model2.eval()
-                    loss_sum = 0.
-                    global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev, desc='Iter (loss=X.XXX)')
-                    for i, batch in enumerate(iter_bar_dev):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
-
-                       
-
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    valid_loss = np.average(valid_losses)
-                    loss_min=early_stopping(valid_loss, model2,rnn_save_name)
-                    valid_losses = []
-
-                    if early_stopping.early_stop:
-                        print("Early stopping")
-                        break
-                model2.load_state_dict(torch.load(rnn_save_name))   
+                if not concurrent:
+                    time_saved += self.fit(e, model2, self.optimizer2, get_loss_Attn_LSTM, rnn_save_name, max_epochs=max_epochs)
                 model2.eval()# evaluation mode
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                global_step3=0
-                
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                        targets, outputs = evalute_Attn_LSTM(model2, batch, global_step3,len(iter_bar))# accuracy to print
-                        loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                        
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
+                metrics = self.evaluate(model2, evalute_Attn_LSTM_SSL, self.data_iter2)
+                acc_total = metrics.accuracy()
+                loss_total = metrics.sample_loss()
                 ddf = open(result_name,'a', encoding='UTF8')
                 ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
                 ddf.close()
                 num_a+=1
+                if self.cfg.best_in_memory:
+                    print('Epoch %d : about %.1fs of checkpoint I/O saved by in-memory early stopping'%(e+1, time_saved))
+                self.flush() # end of the round : every checkpoint is on disk
+                self._snapshot(snapshot, e, 'lstm', num_a, curTemp)
 
          
+        if snapshot is not None:
+            snapshot.finish()
+        self.flush(close=True)
+
+    def state_dict(self):
+        "models and optimizers, for resume.RunSnapshot"
+        return {'model': self.model.state_dict(), 'model2': self.model2.state_dict(),
+                'optimizer': self.optimizer.state_dict(), 'optimizer2': self.optimizer2.state_dict()}
+
+    def load_state_dict(self, state):
+        self.model.load_state_dict(state['model'])
+        self.model2.load_state_dict(state['model2'])
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.optimizer2.load_state_dict(state['optimizer2'])
+
+    def round0_inputs(self):
+        """ what the round-0 models depend on besides their data, for the key of their cache entry
+
+        Every Config field but the RUNTIME_FIELDS, the round-0 patience, the
+        optimizer hyperparameters and the parameter shapes of both models.
+        """
+        cfg = sorted((k, v) for k, v in self.cfg._asdict().items() if k not in RUNTIME_FIELDS)
+        optimizers = [[dict((k, v) for k, v in group.items() if k != 'params') for group in optimizer.param_groups]
+                      for optimizer in (self.optimizer, self.optimizer2)]
+        shapes = [[(k, tuple(v.shape)) for k, v in model.state_dict().items()] for model in (self.model, self.model2)]
+        return cfg, ROUND0_PATIENCE, optimizers, shapes
+
+    def _snapshot(self, snapshot, e, phase, num_a, curTemp):
+        if snapshot is not None:
+            snapshot.save(self, e, phase, {'num_a': num_a, 'curTemp': curTemp})
+
+    def round_epochs(self, data_iter):
+        "epoch budget of a retraining round on data_iter (None : until early stopping)"
+        if not self.cfg.incremental_rounds or not hasattr(data_iter.dataset, 'n_new'):
+            return None
+        return max(1, -(-data_iter.dataset.n_new // self.cfg.rows_per_epoch))
+
+    def fit(self, e, model, optimizer, get_loss, save_name, patience=10, max_epochs=None):
+        """ train a model on data_iter_temp until early stopping on the dev set, keeping the best weights
+
+        max_epochs, if given, ends the training earlier. Returns the
+        checkpoint I/O time saved by in-memory early stopping.
+        """
+        early_stopping = EarlyStopping(patience=patience, verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
+        epochs = 0
+        while(1):
+            model.train()
+            metrics = RunningMetrics(self.device)
+            iter_bar = Progress(self.data_iter_temp, self.cfg.progress_interval)
+            for i, batch in enumerate(iter_bar):
+                batch = [t.to(self.device) for t in batch]
+                loss = get_loss(model, batch, i).mean() # mean() for Data Parallelism
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+                metrics.add(loss)
+                iter_bar.report(loss)
+            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+
+            model.eval()
+            metrics = RunningMetrics(self.device)
+            iter_bar_dev = Progress(self.dataset_dev, self.cfg.progress_interval)
+            for i, batch in enumerate(iter_bar_dev):
+                batch = [t.to(self.device) for t in batch]
+                loss = get_loss(model, batch, i).mean() # mean() for Data Parallelism
+                metrics.add(loss)
+                iter_bar_dev.report(loss)
+            valid_loss = metrics.average_loss()
+            print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, valid_loss))
+
+            early_stopping(valid_loss, model, save_name)
+            if early_stopping.early_stop:
+                print("Early stopping")
+                break
+            epochs += 1
+            if max_epochs is not None and epochs >= max_epochs:
+                print("Epoch budget of the round reached (%d)" % max_epochs)
+                break
+        early_stopping.restore(model)
+        return early_stopping.time_saved
+
+    def fit_together(self, e, model, model2, get_joint_loss, save_name, save_name2, patience=10, max_epochs=None):
+        """ fit() of the CNN and the LSTM in one interleaved pass over data_iter_temp and the dev set
+
+        get_joint_loss(model, model2, batch) embeds the batch once and returns
+        the loss of each model, None for a model passed as None. Each model
+        keeps its own optimizer and early stopping, and leaves the pass once
+        it has stopped, so a round costs about the longer of the two fits.
+        max_epochs, if given, ends both fits earlier.
+        """
+        models = [model, model2]
+        optimizers = [self.optimizer, self.optimizer2]
+        names = [save_name, save_name2]
+        stoppers = [EarlyStopping(patience=patience, verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
+                    for _ in models]
+        epochs = 0
+        while not all(s.early_stop for s in stoppers) and (max_epochs is None or epochs < max_epochs):
+            epochs += 1
+            active = [None if s.early_stop else m for m, s in zip(models, stoppers)]
+            for m in models:
+                m.eval()
+            for m in active:
+                if m is not None:
+                    m.train()
+            metrics = [RunningMetrics(self.device) for _ in models]
+            iter_bar = Progress(self.data_iter_temp, self.cfg.progress_interval)
+            for batch in iter_bar:
+                batch = [t.to(self.device) for t in batch]
+                losses = get_joint_loss(active[0], active[1], batch)
+                for k, loss in enumerate(losses):
+                    if loss is None:
+                        continue
+                    optimizers[k].zero_grad()
+                    loss.backward()
+                    optimizers[k].step()
+                    metrics[k].add(loss)
+                iter_bar.report(sum(loss for loss in losses if loss is not None))
+            for k, m in enumerate(active):
+                if m is not None:
+                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics[k].average_loss()))
+
+            for m in active:
+                if m is not None:
+                    m.eval()
+            metrics = [RunningMetrics(self.device) for _ in models]
+            with torch.no_grad():
+                for batch in Progress(self.dataset_dev, self.cfg.progress_interval):
+                    batch = [t.to(self.device) for t in batch]
+                    for k, loss in enumerate(get_joint_loss(active[0], active[1], batch)):
+                        if loss is not None:
+                            metrics[k].add(loss)
+            for k, m in enumerate(active):
+                if m is None:
+                    continue
+                valid_loss = metrics[k].average_loss()
+                print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, valid_loss))
+                stoppers[k](valid_loss, m, names[k])
+                if stoppers[k].early_stop:
+                    print("Early stopping")
+        time_saved = 0.
+        for m, s in zip(models, stoppers):
+            s.restore(m)
+            time_saved += s.time_saved
+        return time_saved
+
+    def evaluate(self, model, forward, data_iter):
+        """ test loop : RunningMetrics of the model over data_iter, one forward pass per batch
+
+        forward(model, batch) returns the targets and raw logits of a batch;
+        the loss (cross entropy, the training criterion) and the predictions
+        are both derived from these logits.
+        """
+        model.eval()
+        metrics = RunningMetrics(self.device)
+        with torch.no_grad():
+            iter_bar = Progress(data_iter, self.cfg.progress_interval)
+            for batch in iter_bar:
+                batch = [t.to(self.device) for t in batch]
+                targets, logits = forward(model, batch)
+                loss = F.cross_entropy(logits, targets)
+                metrics.add(loss, logits, targets)
+                iter_bar.report(loss)
+        return metrics
 
     def load(self, model_file, pretrain_file):
         """ load saved model or pretrained transformer (a part of model) """
         if model_file:
             print('Loading the model from', model_file)
-            self.model.load_state_dict(torch.load(model_file))
+            self.model.load_state_dict(torch.load(model_file, map_location=self.device))
 
         
     def load2(self, model_file, pretrain_file):
         """ load saved model or pretrained transformer (a part of model) """
         if model_file:
             print('Loading the model from', model_file)
-            self.model2.load_state_dict(torch.load(model_file))
+            self.model2.load_state_dict(torch.load(model_file, map_location=self.device))
 
        
 
     def save(self, i):
         """ save current model """
-        torch.save(self.model.state_dict(), # save model object before nn.DataParallel
+        self._save(self.model.state_dict(), # save model object before nn.DataParallel
             os.path.join(self.save_dir, 'model_steps_'+str(i)+'.pt'))
     def save2(self, i):
         """ save current model """
-        torch.save(self.model2.state_dict(), # save model object before nn.DataParallel
+        self._save(self.model2.state_dict(), # save model object before nn.DataParallel
             os.path.join(self.save_dir, 'model_steps_'+str(i)+'.pt'))
+
+    def _save(self, state, path):
+        "write a state dict, in the background if the writer is on"
+        if self.writer is not None:
+            self.writer.save(state, path)
+        else:
+            torch.save(state, path)
+
+    def flush(self, close=False):
+        "wait for the queued checkpoint writes (close : also stop the writer thread)"
+        if self.writer is not None:
+            if close:
+                self.writer.close()
+            else:
+                self.writer.flush()
         
 class Eval(object):
     """Training Helper Class"""
@@ -544,7 +719,7 @@ class Eval(object):
         
         
         
-        model.load_state_dict(torch.load("./model_save/checkpoint_CNN.pt"))
+        model.load_state_dict(torch.load("./model_save/checkpoint_CNN.pt", map_location=self.device))
         model.eval()# evaluation mode
         p=[]
         l=[]
@@ -584,7 +759,7 @@ class Eval(object):
         print("model1_accuracy: ", results2,"model1_f1score: ", F1score) 
         
         
-        model2.load_state_dict(torch.load("./model_save/checkpoint_LSTM.pt"))   
+        model2.load_state_dict(torch.load("./model_save/checkpoint_LSTM.pt", map_location=self.device))   
         model2.eval()# evaluation mode
         p=[]
         l=[]
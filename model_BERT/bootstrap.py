@@ -0,0 +1,764 @@
+""" Bootstrap engine : lexicon mining, pseudo labeling and co-training of BERT and an attention LSTM,
+    for any dataset of the DATASETS registry """
+
+import itertools
+import csv
+import os
+import random
+from typing import NamedTuple, Callable, Optional
+
+import torch.nn.functional as F
+import torch
+import torch.nn as nn
+from torch.utils.data import Dataset, DataLoader, ConcatDataset
+import numpy as np
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+import tokenization
+import train
+import models
+import optim
+from utils import get_device, set_cpu_threads, truncate_tokens_pair, RowIndexed
+from lexicon import Lexicon, PoolIncidence, score_pool, rank_entries
+from pseudo_label import decide_labels, label_pool
+from pool import read_pool, PoolWords, PoolState, select_balanced
+from ledger import Ledger, PseudoLabeled, RoundSet, replay_sample
+from scoring import PoolScores
+from resume import RunSnapshot
+from stages import ArtifactCache
+
+
+STOPWORDS = frozenset({'', ' ', ',', '.', 'from', 'are', 'is', 'and', 'with', 'may', 'would', 'could',
+                       'have', 'has', 'had', 'was', 'were', 'this', 'who', 'that'})
+
+STOPWORDS_LONG = STOPWORDS | frozenset({
+    'www', 'http', 'com', 'those', 'your', 'not', 'seem', 'too', 'lol', 'but', 'these', 'their', 'can',
+    'there', 'gave', 'his', 'etc', 'thats', 'though', 'off', 'she', 'them', 'huh', 'why', 'wont', 'any',
+    'some', 'its', 'yeah', 'yes', 'you', 'should', 'dont', 'anybody', 'than', 'where', 'for', 'more',
+    'will', 'him', 'wii', 'having', 'just', 'help', 'helps', 'all', 'they', 'take', 'the', 'what',
+    'need', 'make', 'about', 'then', 'when', 'does', 'ask', 'much', 'man', 'know', 'how', 'look', 'like',
+    'one', 'think', 'tell', 'find', 'cant', 'now', 'try', 'give', 'answer', 'her', 'out', 'get',
+    'because', 'myself', 'wants'})
+
+
+class DatasetSpec(NamedTuple):
+    """ Settings of one dataset of the bootstrap engine """
+    name: str # data file prefix and train.Trainer dataName
+    n_labels: int # classes are labeled 0..n_labels-1
+    train_file: str # split into the labeled/dev/unlabeled sets
+    test_file: str
+    tag: str # ledger file name
+    lexicon_file: str # per-class lexicon text files, e.g. './AGNews_Lexicon/agLexicon_%d.txt'
+    lexicon_start: int = 1 # number of the first class file
+    max_len: int = 150
+    stop_num: int = 1000 # stop after two rounds with fewer pseudo labels
+    stopwords: frozenset = STOPWORDS # attended tokens never mined
+    lexicon_size: int = 50 # best mined entries kept per class
+    cross_filter: bool = False # drop entries overlapping a better entry of another class
+    mine_agreement: bool = False # mine only sentences both models predict the same class for
+    lexicon_alone: bool = True # see pseudo_label.decide_labels
+    balance: Callable = min # per-class quota of select_balanced
+    max_words: Optional[int] = None # pool sentences are cut to max_words words
+    batch_size: int = 128 # labeled, dev, test and pseudo-labeled batches
+    lstm_lr: float = 0.005
+
+
+DATASETS = {
+    'AGNews': DatasetSpec('AGNews', 4, './total_data/agtrain.tsv', './total_data/ag_test.tsv', 'AGNews', './AGNews_Lexicon/agLexicon_%d.txt',
+                          cross_filter=True),
+    'IMDB': DatasetSpec('IMDB', 2, './total_data/imdbtrain.tsv', './total_data/IMDB_test.tsv', 'IMDB', './IMDB_Lexicon/imdbLexicon_%d.txt',
+                        max_len=300, stop_num=250, stopwords=STOPWORDS_LONG | {'movie', 'film', 'films'},
+                        cross_filter=True, batch_size=64, lstm_lr=0.001),
+    'yahoo': DatasetSpec('yahoo', 10, './total_data/yahootrain.tsv', './total_data/yahoo_test.tsv', 'yahoo', './yahoo_Lexicon/yahooLexicon_%d.txt',
+                         lexicon_start=0, max_len=100, stopwords=STOPWORDS_LONG,
+                         lexicon_alone=False, balance=max, max_words=100, lstm_lr=0.01),
+    'dbpedia': DatasetSpec('dbpedia', 14, './total_data/dbtrain.tsv', './total_data/db_test.tsv', 'DBpedia', './DBpedia_Lexicon/dbLexicon_%d.txt',
+                           lexicon_start=0, max_len=200, batch_size=48),
+}
+
+ALIASES = {'ag': 'AGNews'}
+
+
+def dataset_spec(name):
+    """ Mapping from dataset name (any case) to DatasetSpec """
+    table = {key.lower(): spec for key, spec in DATASETS.items()}
+    table.update((alias, DATASETS[key]) for alias, key in ALIASES.items())
+    return table[name.lower()]
+
+
+class CsvDataset(Dataset):
+    """ Dataset Class for CSV file """
+    labels = None
+
+    def __init__(self, file, pipeline=[]): # cvs file and pipeline object
+        Dataset.__init__(self)
+        data = []
+
+        with open(file, "r", encoding='utf-8') as f:
+            # list of splitted lines : line is also list
+            lines = csv.reader(f, delimiter='\t')
+
+            for instance in self.get_instances(lines): # instance : tuple of fields
+                for proc in pipeline: # a bunch of pre-processing
+                    instance = proc(instance)
+                data.append(instance)
+
+        # To Tensors
+        self.tensors = [torch.tensor(x, dtype=torch.long) for x in zip(*data)]
+
+    @classmethod
+    def from_tensors(cls, tensors):
+        "dataset over already tokenized tensors (e.g. the .tensors of an earlier one)"
+        dataset = cls.__new__(cls)
+        Dataset.__init__(dataset)
+        dataset.tensors = tensors
+        return dataset
+
+    def __len__(self):
+        return self.tensors[0].size(0)
+
+    def __getitem__(self, index):
+        return [tensor[index] for tensor in self.tensors]
+
+    def get_instances(self, lines):
+        """ get instance array from (csv-separated) line list """
+        raise NotImplementedError
+
+
+class MRPC(CsvDataset):
+    """ Dataset class for label<TAB>text files, label names set by the dataset spec """
+    def __init__(self, file, pipeline=[]):
+        super().__init__(file, pipeline)
+
+    def get_instances(self, lines):
+        for line in itertools.islice(lines, 0, None): # skip header
+            if(line[0]=="" or line[1]==""):
+                continue
+            yield line[0], line[1].encode('utf8'),None # label, text_a, text_b
+
+
+class MNLI(CsvDataset):
+    """ Dataset class for MNLI """
+    labels = ("contradiction", "entailment", "neutral") # label names
+    def __init__(self, file, pipeline=[]):
+        super().__init__(file, pipeline)
+
+    def get_instances(self, lines):
+        for line in itertools.islice(lines, 0, None): # skip header
+            yield line[-1], line[8], line[9] # label, text_a, text_b
+
+
+def dataset_class(task):
+    """ Mapping from task string to Dataset Class """
+    table = {'mrpc': MRPC, 'mnli': MNLI}
+    return table[task]
+
+
+class Pipeline():
+    """ Preprocess Pipeline Class : callable """
+    def __init__(self):
+        super().__init__()
+
+    def __call__(self, instance):
+        raise NotImplementedError
+
+
+class Tokenizing(Pipeline):
+    """ Tokenizing sentence pair """
+    def __init__(self, preprocessor, tokenize):
+        super().__init__()
+        self.preprocessor = preprocessor # e.g. text normalization
+        self.tokenize = tokenize # tokenize function
+
+    def __call__(self, instance):
+        label, text_a, text_b = instance
+
+        label = self.preprocessor(label)
+        tokens_a = self.tokenize(self.preprocessor(text_a))
+        tokens_b = self.tokenize(self.preprocessor(text_b)) \
+                   if text_b else []
+
+        return (label, tokens_a, tokens_b)
+
+
+class AddSpecialTokensWithTruncation(Pipeline):
+    """ Add special tokens [CLS], [SEP] with truncation """
+    def __init__(self, max_len=512):
+        super().__init__()
+        self.max_len = max_len
+
+    def __call__(self, instance):
+        label, tokens_a, tokens_b  = instance
+
+        _max_len = self.max_len - 3 if tokens_b else self.max_len - 2
+        truncate_tokens_pair(tokens_a, tokens_b, _max_len)
+        # -3 special tokens for [CLS] text_a [SEP] text_b [SEP]
+        # -2 special tokens for [CLS] text_a [SEP]
+
+        return (label, tokens_a)
+
+
+class TokenIndexing(Pipeline):
+    """ Convert tokens into token indexes and do zero-padding """
+    def __init__(self, indexer, labels, max_len=512):
+        super().__init__()
+        self.indexer = indexer # function : tokens to indexes
+        # map from a label name to a label index
+        self.label_map = {name: i for i, name in enumerate(labels)}
+        self.max_len = max_len
+
+    def __call__(self, instance):
+        label, tokens_a = instance
+        input_ids = self.indexer(tokens_a )
+        seq_lengths = len(input_ids)
+        segment_ids = [0]*len(tokens_a) # token type ids
+        input_mask = [1]*len(tokens_a)
+        label_id = self.label_map[label]
+        # zero padding
+        n_pad = self.max_len - len(input_ids)
+        input_ids.extend([0]*n_pad)
+        segment_ids.extend([0]*n_pad)
+        input_mask.extend([0]*n_pad)
+
+        return (input_ids, segment_ids, input_mask, label_id,seq_lengths)
+
+
+class Classifier_Attention_LSTM(nn.Module):
+    def __init__(self,  n_labels):
+        super().__init__()
+        self.rnn = nn.LSTM(300, 300, batch_first=True)
+        self.tanh1 = nn.Tanh()
+        self.w = nn.Parameter(torch.zeros(300))
+        self.tanh2 = nn.Tanh()
+        self.fc1 = nn.Linear(300,n_labels)
+
+    def forward(self,token2, input_ids, segment_ids, input_mask,seq_lengths):
+        packed_input = pack_padded_sequence(token2, seq_lengths.cpu().numpy(), batch_first=True)
+        packed_output,(final_hidden_state, final_cell_state) = self.rnn(packed_input)
+        r_output, input_sizes = pad_packed_sequence(packed_output, batch_first=True)
+        output = r_output
+        # padded positions (past each sentence) get no attention : a sentence scores the same in any batch
+        padded = torch.arange(output.size(1), device=output.device)[None, :] >= seq_lengths.to(output.device)[:, None]
+        alpha = F.softmax(torch.matmul(output, self.w).masked_fill(padded, float('-inf')), 1).unsqueeze(-1)  # [128, 32, 1]
+
+        out = r_output * alpha  # [128, 32, 256]
+        out = torch.sum(out, 1)  # [128, 256]
+        out = F.relu(out)
+        out = self.fc1(out)
+        return out, alpha.squeeze(2)
+
+
+class Classifier(nn.Module):
+    """ Classifier with Transformer """
+    def __init__(self, cfg, n_labels):
+        super().__init__()
+        self.transformer = models.Transformer(cfg)
+        self.fc = nn.Linear(cfg.dim, cfg.dim)
+        self.activ = nn.Tanh()
+        self.drop = nn.Dropout(cfg.p_drop_hidden)
+        self.classifier = nn.Linear(cfg.dim, n_labels)
+
+    def forward(self, input_ids, segment_ids, input_mask):
+        # trim the batch to its longest sequence : the padding after it is masked out in attention anyway
+        n = int(input_mask.sum(1).max())
+        input_ids, segment_ids, input_mask = input_ids[:, :n], segment_ids[:, :n], input_mask[:, :n]
+        h = self.transformer(input_ids, segment_ids, input_mask)
+        # only use the first h in the sequence
+        pooled_h = self.activ(self.fc(h[:, 0]))
+        logits = self.classifier(self.drop(pooled_h))
+        return logits
+
+
+class Classifier_CNN(nn.Module):
+    """ Classifier with Transformer """
+    def __init__(self, n_labels):
+        super().__init__()
+        self.Lin1 = nn.Linear(100,n_labels)
+        self.activ = nn.Tanh()
+        self.drop = nn.Dropout(0.5)
+        self.fc1 = nn.Linear(300, n_labels)  # a dense layer for classification
+        self.convs_1d = nn.ModuleList([
+            nn.Conv2d(1, 100, (k, 300), padding=[k-2,0])
+            for k in [3,4,5]])
+
+    def conv_and_pool(self, x, conv,x1):
+        x = conv(x)
+        x = F.relu(x)
+        x = x.squeeze(3)
+        x = F.max_pool1d(x, x.size(2)).squeeze(2)
+        return x
+
+    def forward(self, token2, input_ids, segment_ids, input_mask):
+        embeds = token2.unsqueeze(1)
+        conv_results = [self.conv_and_pool(embeds, conv,input_ids) for conv in self.convs_1d]
+        x = torch.cat(conv_results, 1)
+        logits = self.fc1(self.drop(x))
+        return logits,logits
+
+
+def split_files(spec, kkk):
+    "unlabeled, dev, labeled and test file names of split kkk (0..4)"
+    data_unlabeled_file = "./data/"+spec.name + "_unlabeled" + str(kkk+1)+".tsv"
+    data_dev_file = "./data/" + spec.name + "_dev" + str(kkk+1)+".tsv"
+    data_labeled_file = "./data/" + spec.name + "_labeled" + str(kkk+1)+".tsv"
+    data_test_file = spec.test_file
+    return data_unlabeled_file, data_dev_file, data_labeled_file, data_test_file
+
+
+def split_dataset(spec, kkk, rng=random):
+    """ write the labeled, dev and unlabeled sets of split kkk (0..4) of spec.train_file
+
+    rng shuffles the data (kkk+1 times). Returns the unlabeled, dev, labeled
+    and test file names.
+    """
+    labelNum = spec.n_labels
+    data_unlabeled_file, data_dev_file, data_labeled_file, data_test_file = split_files(spec, kkk)
+    data_total_file = spec.train_file
+    f_total = open(data_total_file, 'r', encoding='utf-8')
+    r_total = csv.reader(f_total, delimiter='\t')
+
+    allD=[]
+    for line in r_total:
+        allD.append([line[0],line[1]])
+    f_total.close()
+
+    for ii in range(0, kkk+1):
+        rng.shuffle(allD)
+    num_data = len(allD)
+    num_data_dev_temp = int(int(num_data*0.01)/labelNum)
+    num_data_dev = int(int(num_data_dev_temp*0.15)/labelNum)
+    num_data_labeled = int(int(num_data_dev_temp*0.85)/labelNum)
+    num_data_unlabeled = num_data - int(num_data_dev_temp*labelNum)
+
+    print("num_data_dev#: ", num_data_dev)
+    print("num_data_labeled#: ",num_data_labeled)
+    print("num_data_unlabeled#: ",num_data_unlabeled)
+
+    f_temp = open('./data/temp_data.tsv', 'w', encoding='utf-8', newline='')
+    w_temp = csv.writer(f_temp, delimiter='\t')
+
+    f_unlabeled = open(data_unlabeled_file, 'w', encoding='utf-8', newline='')
+    w_unlabeled = csv.writer(f_unlabeled, delimiter='\t')
+
+    allD2=[]
+    tempD={}
+    for line in allD:
+        if(line[0] not in tempD):
+            allD2.append([line[0],line[1]])
+            tempD[line[0]] = 1
+        elif(tempD[line[0]] <= int(num_data_dev_temp/labelNum)):
+            allD2.append([line[0],line[1]])
+            tempD[line[0]] += 1
+        elif(tempD[line[0]] <= int(num_data_dev_temp/labelNum)+int(num_data_unlabeled/labelNum)):
+            allD2.append([line[0],line[1]])
+            tempD[line[0]] += 1
+
+    tempD={}
+    for line in allD2:
+        if(line[0] not in tempD):
+            tempD[line[0]] = 1
+            w_temp.writerow([line[0],line[1]])
+        elif(tempD[line[0]] <= int(num_data_dev_temp/labelNum)):
+            tempD[line[0]] += 1
+            w_temp.writerow([line[0],line[1]])
+        elif(tempD[line[0]] <= int(num_data_dev_temp/labelNum)+int(num_data_unlabeled/labelNum)):
+            w_unlabeled.writerow([line[0],line[1]])
+            tempD[line[0]] += 1
+
+    f_temp.close()
+    f_unlabeled.close()
+
+    f_temp = open('./data/temp_data.tsv', 'r', encoding='utf-8')
+    r_temp = csv.reader(f_temp, delimiter='\t')
+
+    f_dev = open(data_dev_file, 'w', encoding='utf-8', newline='')
+    w_dev = csv.writer(f_dev, delimiter='\t')
+
+    f_labeled = open(data_labeled_file, 'w', encoding='utf-8', newline='')
+    w_labeled = csv.writer(f_labeled, delimiter='\t')
+
+    tempD={}
+    for line in r_temp:
+        if(line[0] not in tempD):
+            tempD[line[0]] = 1
+            w_dev.writerow([line[0],line[1]])
+        elif(tempD[line[0]] <= (num_data_dev/labelNum)):
+            tempD[line[0]] += 1
+            w_dev.writerow([line[0],line[1]])
+        else:
+            w_labeled.writerow([line[0],line[1]])
+
+    f_temp.close()
+    f_dev.close()
+    f_labeled.close()
+    return data_unlabeled_file, data_dev_file, data_labeled_file, data_test_file
+
+
+def cached_split(cache, spec, kkk, seed):
+    """ split_dataset through the artifact cache
+
+    With the cache on, the split of a (dataset, trial, seed) is drawn once from
+    its own seeded RNG and its files are restored from the cache afterwards.
+    """
+    files = split_files(spec, kkk)
+    def draw():
+        split_dataset(spec, kkk, random.Random('%s/%d/%d' % (spec.name, seed, kkk)) if cache.root else random)
+        return [torch.from_numpy(np.fromfile(name, dtype=np.uint8)) for name in files[:3]]
+    split = cache.stage('split', draw, cache.file(spec.train_file), spec.n_labels, kkk, seed)
+    if split.cached:
+        for name, content in zip(files, split.value):
+            content.numpy().tofile(name)
+    return files
+
+
+def load_dataset(cache, TaskDataset, file, pipeline, *inputs):
+    "TaskDataset(file, pipeline) through the artifact cache, inputs identifying the pipeline"
+    tensors = cache.stage('tokenized', lambda: TaskDataset(file, pipeline).tensors,
+                          TaskDataset.__name__, cache.file(file), *inputs).value
+    return TaskDataset.from_tensors(tensors)
+
+
+def main(dataName,
+         task='mrpc',
+         train_cfg='./model/config/train_mrpc.json',
+         model_cfg='./model/config/bert_base.json',
+         model_file=None,
+         pretrain_file='./model/uncased_L-12_H-768_A-12/bert_model.ckpt',
+         data_parallel=False,
+         vocab='./model/uncased_L-12_H-768_A-12/vocab.txt',
+         stopNum=None,
+         max_len=None,
+         mode='train',
+         lexicon_text=True,
+         pseudo_label_workers=0,
+         trials=None,
+         resume=False,
+         data_train_file=None,
+         data_test_file=None):
+    """ bootstrap (mode='train') or evaluate (mode='eval') on the registered dataset dataName
+
+    stopNum, max_len, data_train_file and data_test_file default to the ones
+    of the dataset spec. trials are
+    the random splits (0..4) to run, all five by default. resume restarts
+    every trial from its last snapshot (see resume.RunSnapshot) : completed
+    trials are skipped, the others go on after their last completed phase.
+    """
+    spec = dataset_spec(dataName)
+    spec = spec._replace(train_file=data_train_file or spec.train_file, test_file=data_test_file or spec.test_file)
+    labelNum = spec.n_labels
+    stopNum = spec.stop_num if stopNum is None else stopNum
+    max_len = spec.max_len if max_len is None else max_len
+    cfg = train.Config.from_json(train_cfg)
+    set_cpu_threads(cfg.cpu_threads, cfg.cpu_interop_threads, cfg.cpu_cores)
+    device = get_device(cfg.device)
+    tokenizer = tokenization.FullTokenizer(do_lower_case=True)
+    TaskDataset = dataset_class(task) # task dataset class according to the task
+    label_names = TaskDataset.labels or [str(i) for i in range(labelNum)]
+    pipeline = [Tokenizing(tokenizer.convert_to_unicode, tokenizer.tokenize),
+                AddSpecialTokensWithTruncation(max_len),
+                TokenIndexing(tokenizer.convert_tokens_to_ids,
+                              label_names, max_len)]
+
+    if mode == 'train':
+        def get_loss_CNN(model, batch, global_step): # make sure loss is a scalar tensor
+            input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
+            logits = model(input_ids, segment_ids, input_mask)
+            loss = criterion(logits, label_id)
+            return loss
+
+        def get_loss_Attn_LSTM(model, batch, global_step): # make sure loss is a scalar tensor
+            input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
+
+            seq_lengths, perm_idx = seq_lengths.sort(0, descending=True)
+            input_ids = input_ids[perm_idx]
+            label_id = label_id[perm_idx]
+            token1 = embedding(input_ids.long())
+
+            logits,attention_score = model(token1,input_ids, segment_ids, input_mask,seq_lengths)
+
+            loss1 = criterion(logits, label_id)
+            return loss1
+
+        def score_unlabeled(model, model2, batch, batch_b, global_step, ls, e):
+            "BERT over the wordpiece batch, the LSTM over the GloVe batch of the same pool rows"
+            if(global_step== 0):
+                pool_scores.reset()
+
+            input_ids, segment_ids, input_mask, label_id,seq_lengths, row_ids = batch_b
+            logits = model(input_ids, segment_ids, input_mask)
+            pool_scores.update_model1(row_ids.cpu().numpy(), logits)
+
+            input_ids, segment_ids, input_mask, label_id,seq_lengths, row_ids = batch
+
+            seq_lengths, perm_idx = seq_lengths.sort(0, descending=True)
+            input_ids = input_ids[perm_idx]
+            row_ids = row_ids[perm_idx]
+            token1 = embedding(input_ids.long())
+            logits2,attention_score2 = model2(token1,input_ids, segment_ids, input_mask,seq_lengths)
+
+            pool_scores.update_model2(row_ids.cpu().numpy(), logits2, attention_score2)
+
+        def generating_lexiocn(e):
+            result3.clear()
+            result_label.clear()
+
+            # per-class {word set: [entry, summed max LSTM logit]} over the pool sentences the LSTM attends to
+            class_scores = [{} for _ in range(labelNum)]
+            rows = pool_state.loader_rows
+            n_tokens = np.diff(pool_words.tokens_offsets)[rows]
+            mined = (n_tokens > pool_scores.attn_pos[rows]) & (pool_scores.attn_max[rows] > 0)
+            if spec.mine_agreement:
+                mined &= pool_scores.pred1[rows] == pool_scores.pred2[rows]
+            for row in rows[mined]:
+                token2 = pool_words.lexicon_entry(row, pool_scores.attn_topk[row], spec.stopwords)
+                if(token2 is None):
+                    continue
+                key = ' '.join(sorted(token2)) # the same words attended in another order are the same entry
+                scores = class_scores[pool_scores.pred2[row]]
+                scores.setdefault(key, [' '.join(token2), 0])[1] += pool_scores.logit2[row] # first order seen is shown
+
+            class_scores = [dict(scores.values()) for scores in class_scores]
+            lexicon.update(rank_entries(class_scores, spec.lexicon_size, spec.cross_filter))
+            lexicon.save(lexicon_snapshot(lexicon.version))
+            if lexicon_text:
+                lexicon.write_text(spec.lexicon_file, spec.lexicon_start)
+
+        def evalute_CNN_SSL(model, batch, global_step=0):
+            input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
+            logits = model(input_ids, segment_ids, input_mask)
+
+            return label_id, logits
+
+        def pseudo_labeling(e):
+            rows = pool_state.loader_rows
+            pool_state.candidate[:] = -1
+            pool_state.candidate_rule[:] = 0
+            pool_state.candidate_conf[:] = 0
+
+            pred1, conf1, pred2, conf2 = pool_scores.predictions(rows)
+            if(pseudo_label_workers):
+                pool_labels, pool_rules, pool_conf = label_pool(pool_words, rows, pred1, conf1, pred2, conf2, lexicon,
+                                                                n_workers=pseudo_label_workers,
+                                                                lexicon_alone=spec.lexicon_alone)
+            else:
+                lexicon_counts = score_pool(pool_incidence, lexicon)
+                pool_labels, pool_rules, pool_conf = (x.numpy() for x in decide_labels(
+                    lexicon_counts[0][rows], lexicon_counts[1][rows], pred1, conf1, pred2, conf2,
+                    lexicon_alone=spec.lexicon_alone))
+            pool_state.candidate[rows] = pool_labels
+            pool_state.candidate_rule[rows] = pool_rules
+            pool_state.candidate_conf[rows] = pool_conf
+
+            print("candidates per class#:", pool_state.candidate_counts(labelNum))
+            chosen = select_balanced(pool_state, labelNum, spec.balance)
+            ledger.append(chosen, pool_state.candidate[chosen], (e+1)//2,
+                          pool_state.candidate_rule[chosen], pool_state.candidate_conf[chosen])
+
+            result_label.clear()
+            result3.clear()
+            for i in chosen:
+                result_label.append(str(pool_state.gold[i]))
+                result3.append(str(pool_state.pseudo_label[i]))
+            print("################;" , (~pool_state.selected).sum())
+
+            data_iter_temp, data_iter_temp_b = retrain_loaders()
+            data_iter_temp_na, data_iter_temp_na_b = pool_loaders()
+
+            return result_label, result3, data_iter_temp, data_iter_temp_b, data_iter_temp_na, data_iter_temp_na_b
+
+        def evalute_Attn_LSTM_SSL(model, batch):
+            input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
+
+            seq_lengths, perm_idx = seq_lengths.sort(0, descending=True)
+            input_ids = input_ids[perm_idx]
+            label_id = label_id[perm_idx]
+            token1 = embedding(input_ids.long())
+
+            logits,attention_score = model(token1,input_ids, segment_ids, input_mask,seq_lengths)
+
+            return label_id, logits
+
+        def pool_loaders():
+            """ loaders of both pipelines over the pool rows not pseudo-labeled yet, batches carrying their row ids
+
+            The rows are visited longest wordpiece sequence first, so each
+            trimmed BERT batch holds sequences of about the same length.
+            """
+            pool_state.loader_rows = np.flatnonzero(~pool_state.selected)
+            order = pool_state.loader_rows[np.argsort(-pool_lengths[pool_state.loader_rows], kind='stable')]
+            return (DataLoader(RowIndexed(dataset, order), batch_size=cfg.infer_batch_size, shuffle=False),
+                    DataLoader(RowIndexed(dataset_b, order), batch_size=cfg.infer_batch_size, shuffle=False))
+
+        def retrain_loaders():
+            """ labeled data plus every pseudo label so far, as index views over the pool datasets of both pipelines
+
+            With cfg.incremental_rounds : the pseudo labels of the last round,
+            plus the same replay sample of the older rows in both pipelines,
+            drawn from a seed of the round.
+            """
+            if cfg.incremental_rounds:
+                last = ledger.last_round()
+                records, older = ledger.rounds(last, last), ledger.rounds(0, last-1)
+                old = ConcatDataset([dataset3, PseudoLabeled(dataset, older)])
+                old_b = ConcatDataset([dataset3_b, PseudoLabeled(dataset_b, older)])
+                replay = replay_sample(len(old), cfg.replay_size, [cfg.seed, kkk, last])
+                dataset_temp = RoundSet(PseudoLabeled(dataset, records), old, replay)
+                dataset_temp_b = RoundSet(PseudoLabeled(dataset_b, records), old_b, replay)
+            else:
+                records = ledger.rounds()
+                dataset_temp = ConcatDataset([dataset3, PseudoLabeled(dataset, records)])
+                dataset_temp_b = ConcatDataset([dataset3_b, PseudoLabeled(dataset_b, records)])
+            return (DataLoader(dataset_temp, batch_size=spec.batch_size, shuffle=True),
+                    DataLoader(dataset_temp_b, batch_size=spec.batch_size, shuffle=True))
+
+        def lexicon_snapshot(version):
+            return (os.path.splitext(spec.lexicon_file)[0] + "_round%d.npz") % (kkk+1, version)
+
+        def get_state(): # bootstrap state of the trial for RunSnapshot : the rest is rebuilt from the ledger
+            return {'ledger': len(ledger),
+                    'lexicon': lexicon.version,
+                    'pool_scores': {name: torch.from_numpy(value) for name, value in vars(pool_scores).items()
+                                    if isinstance(value, np.ndarray)}}
+
+        def set_state(state):
+            nonlocal lexicon
+            ledger.truncate(state['ledger'])
+            pool_state.restore(ledger.records)
+            if state['lexicon']:
+                lexicon = Lexicon.load(lexicon_snapshot(state['lexicon']))
+            for name, value in state['pool_scores'].items():
+                getattr(pool_scores, name)[:] = value.numpy()
+            return (retrain_loaders() if len(ledger) else (data_iter3, data_iter3_b)) + pool_loaders()
+
+        model_cfg_file, model_cfg = model_cfg, models.Config.from_json(model_cfg)
+
+        cache = ArtifactCache(cfg.artifact_cache)
+        embeddings = cache.file(tokenization.EMBEDDINGS_FILE, stamp=True) # source of the token ids and vectors
+        tokenizing = ('glove', embeddings, max_len, label_names) # what the tokenized sets depend on
+        tokenizing_b = ('wordpiece', cache.file(vocab), max_len, label_names)
+        for kkk in (range(0, 5) if trials is None else trials):
+            tokenizer1 = tokenization.FullTokenizer1(vocab_file=vocab, do_lower_case=True)
+            pipeline1 = [Tokenizing(tokenizer1.convert_to_unicode, tokenizer1.tokenize),
+                         AddSpecialTokensWithTruncation(max_len),
+                         TokenIndexing(tokenizer1.convert_tokens_to_ids1,
+                                       label_names, max_len)]
+
+            snapshot = RunSnapshot('./temp_data/resume_%s_%d.pt' % (spec.tag, kkk+1), get_state, set_state)
+            resumed = resume and cfg.phase_snapshots and snapshot.exists()
+            if resumed and snapshot.completed():
+                print("trial %d already completed" % (kkk+1))
+                continue
+            if resumed: # the split of the interrupted run
+                data_unlabeled_file, data_dev_file, data_labeled_file, data_test_file = split_files(spec, kkk)
+            else:
+                snapshot.remove()
+                data_unlabeled_file, data_dev_file, data_labeled_file, data_test_file = cached_split(cache, spec, kkk, cfg.seed)
+
+            dataset = load_dataset(cache, TaskDataset, data_unlabeled_file, pipeline, *tokenizing)
+            dataset_b = load_dataset(cache, TaskDataset, data_unlabeled_file, pipeline1, *tokenizing_b)
+            pool_lengths = dataset_b.tensors[2].sum(1).numpy() # wordpiece tokens of each pool row
+            data0, gold = read_pool(data_unlabeled_file, spec.max_words)
+            pool_state = PoolState(gold)
+            pool_words = PoolWords.build(data0, tokenizer.tokenize)
+            pool_incidence = PoolIncidence.from_pool(pool_words) # the pool is fixed for the trial : matched every round
+            data_iter, data_iter_b = pool_loaders()
+
+            dataset2 = load_dataset(cache, TaskDataset, data_test_file, pipeline, *tokenizing)
+            data_iter2 = DataLoader(dataset2, batch_size=spec.batch_size, shuffle=False)
+            dataset2_b = load_dataset(cache, TaskDataset, data_test_file, pipeline1, *tokenizing_b)
+            data_iter2_b = DataLoader(dataset2_b, batch_size=spec.batch_size, shuffle=False)
+
+            dataset_dev = load_dataset(cache, TaskDataset, data_dev_file, pipeline, *tokenizing)
+            data_iter_dev = DataLoader(dataset_dev, batch_size=spec.batch_size, shuffle=False)
+            dataset_dev_b = load_dataset(cache, TaskDataset, data_dev_file, pipeline1, *tokenizing_b)
+            data_iter_dev_b = DataLoader(dataset_dev_b, batch_size=spec.batch_size, shuffle=False)
+
+            dataset3 = load_dataset(cache, TaskDataset, data_labeled_file, pipeline, *tokenizing)
+            data_iter3 = DataLoader(dataset3, batch_size=spec.batch_size, shuffle=True)
+            dataset3_b = load_dataset(cache, TaskDataset, data_labeled_file, pipeline1, *tokenizing_b)
+            data_iter3_b = DataLoader(dataset3_b, batch_size=spec.batch_size, shuffle=True)
+
+            if tokenization.SHARED_EMBEDDINGS: # already a view of the mapped vectors
+                weights = tokenization.embed_lookup2()
+            else:
+                weights = cache.stage('embedding', tokenization.embed_lookup2, embeddings).value
+
+            print("#train_set:", len(data_iter))
+            print("#test_set:", len(data_iter2))
+            print("#short_set:", len(data_iter3))
+            print("#dev_set:", len(data_iter_dev))
+
+            embedding = nn.Embedding.from_pretrained(weights).to(device)
+            criterion = nn.CrossEntropyLoss()
+
+            model = Classifier(model_cfg, labelNum)
+            model2 = Classifier_Attention_LSTM(labelNum)
+
+            trainer = train.Trainer(cfg,
+                                    spec.name,
+                                    stopNum,
+                                    model,
+                                    model2,
+                                    data_iter,
+                                    data_iter_b,
+                                    data_iter2,
+                                    data_iter2_b,
+                                    data_iter3,
+                                    data_iter3_b,
+                                    data_iter_dev,
+                                    data_iter_dev_b,
+                                    optim.optim4GPU(cfg, model,len(data_iter)*10 ),
+                                    torch.optim.Adam(model2.parameters(), lr=spec.lstm_lr),
+                                    device,kkk+1)
+            # round-0 supervised models : a function of the labeled and dev sets, the embedding, the BERT weights
+            # and the training settings
+            round0 = cache.entry('round0', cache.file(data_labeled_file), cache.file(data_dev_file), tokenizing, tokenizing_b,
+                                 cache.file(model_cfg_file), model_file and cache.file(model_file, stamp=True),
+                                 pretrain_file, labelNum, spec.batch_size, *trainer.round0_inputs())
+
+            result3=[]
+            result_label=[]
+            lexicon = Lexicon(labelNum)
+            pool_scores = PoolScores(len(pool_state))
+            ledger = Ledger('./temp_data/ledger_%s_%d.bin' % (spec.tag, kkk+1), reset=not resumed)
+
+            trainer.train(model_file, pretrain_file, get_loss_CNN, get_loss_Attn_LSTM,evalute_CNN_SSL,pseudo_labeling,evalute_Attn_LSTM_SSL,generating_lexiocn, data_parallel,
+                          score_unlabeled=score_unlabeled,
+                          snapshot=snapshot if cfg.phase_snapshots else None, resume=resumed, round0=round0)
+            cache.report()
+
+    elif mode == 'eval':
+        def evalute_Attn_LSTM_SSL(model, batch):
+            input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
+
+            seq_lengths, perm_idx = seq_lengths.sort(0, descending=True)
+            input_ids = input_ids[perm_idx]
+            label_id = label_id[perm_idx]
+            token1 = embedding(input_ids.long())
+
+            logits,attention_score = model2(token1,input_ids, segment_ids, input_mask,seq_lengths)
+
+            return label_id, logits
+
+        def evalute_CNN_SSL(model, batch):
+            input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
+            token1 = embedding(input_ids.long())
+            logits,attention_score = model(token1,input_ids, segment_ids, input_mask)
+
+            return label_id, logits
+
+        dataset2 = TaskDataset(spec.test_file, pipeline)
+        data_iter = DataLoader(dataset2, batch_size=spec.batch_size, shuffle=False)
+
+        weights = tokenization.embed_lookup2()
+        embedding = nn.Embedding.from_pretrained(weights).to(device)
+
+        model = Classifier_CNN(labelNum)
+        model2 = Classifier_Attention_LSTM(labelNum)
+
+        trainer = train.Eval(cfg,
+                             model,
+                             model2,
+                             data_iter,
+                             "./model_save", device)
+        results = trainer.eval(evalute_CNN_SSL, evalute_Attn_LSTM_SSL, data_parallel)
@@ -1,21 +1,31 @@
 # Copyright 2018 Dong-Hyun Lee, Kakao Brain.
 
-""" Load a checkpoint file of pretrained transformer to a model in pytorch """
+""" Load a checkpoint file of pretrained transformer to a model in pytorch
+
+TensorFlow is imported only when a TF checkpoint is read : a checkpoint
+converted once by convert_checkpoint.py is a plain pytorch file.
+"""
+
+import os
 
 import numpy as np
-import tensorflow as tf
 import torch
 #import ipdb
 #from models import *
 
-def load_param(checkpoint_file, conversion_table):
+def load_param(checkpoint_file, conversion_table, reader=None):
     """
     Load parameters in pytorch model from checkpoint file according to conversion_table
     checkpoint_file : pretrained checkpoint model file in tensorflow
     conversion_table : { pytorch tensor in a model : checkpoint variable name }
+    reader : checkpoint reader opened once (None : one read of the file per variable)
     """
     for pyt_param, tf_param_name in conversion_table.items():
-        tf_param = tf.train.load_variable(checkpoint_file, tf_param_name)
+        if reader is None:
+            import tensorflow as tf
+            tf_param = tf.train.load_variable(checkpoint_file, tf_param_name)
+        else:
+            tf_param = reader.get_tensor(tf_param_name)
 
         # for weight(kernel), we should do transpose
         if tf_param_name.endswith('kernel'):
@@ -24,28 +34,28 @@ def load_param(checkpoint_file, conversion_table):
         assert pyt_param.size() == tf_param.shape, \
             'Dim Mismatch: %s vs %s ; %s' % \
                 (tuple(pyt_param.size()), tf_param.shape, tf_param_name)
-        
+
         # assign pytorch tensor from tensorflow param
         pyt_param.data = torch.from_numpy(tf_param)
 
 
-def load_model(model, checkpoint_file):
-    """ Load the pytorch model from checkpoint file """
+def conversion_table(model):
+    """ { pytorch tensor in the transformer : checkpoint variable name } """
 
     # Embedding layer
     e, p = model.embed, 'bert/embeddings/'
-    load_param(checkpoint_file, {
+    table = {
         e.tok_embed.weight: p+"word_embeddings",
         e.pos_embed.weight: p+"position_embeddings",
         e.seg_embed.weight: p+"token_type_embeddings",
         e.norm.gamma:       p+"LayerNorm/gamma",
         e.norm.beta:        p+"LayerNorm/beta"
-    })
+    }
 
     # Transformer blocks
     for i in range(len(model.blocks)):
         b, p = model.blocks[i], "bert/encoder/layer_%d/"%i
-        load_param(checkpoint_file, {
+        table.update({
             b.attn.proj_q.weight:   p+"attention/self/query/kernel",
             b.attn.proj_q.bias:     p+"attention/self/query/bias",
             b.attn.proj_k.weight:   p+"attention/self/key/kernel",
@@ -63,4 +73,33 @@ def load_model(model, checkpoint_file):
             b.norm2.gamma:          p+"output/LayerNorm/gamma",
             b.norm2.beta:           p+"output/LayerNorm/beta",
         })
+    return table
+
+
+def load_model(model, checkpoint_file, reader=None):
+    """ Load the pytorch model from checkpoint file """
+    load_param(checkpoint_file, conversion_table(model), reader)
 
+
+def open_checkpoint(checkpoint_file):
+    "a reader of the TF checkpoint, opened once for all its variables"
+    import tensorflow as tf
+    return tf.train.load_checkpoint(checkpoint_file)
+
+
+def converted_file(checkpoint_file):
+    "the pytorch file convert_checkpoint.py writes for a TF checkpoint (bert_model.ckpt -> bert_model.pt)"
+    return os.path.splitext(checkpoint_file)[0] + '.pt'
+
+
+def load_transformer(pretrain_file):
+    """ transformer state dict of a pytorch pretrain file (keys 'transformer.*')
+
+    The file is memory-mapped when torch can (>= 2.1, zip format) : the pages
+    are read on demand and shared by the processes mapping the same file.
+    """
+    try:
+        state = torch.load(pretrain_file, map_location='cpu', mmap=True)
+    except (TypeError, RuntimeError): # older torch or legacy format : read in full
+        state = torch.load(pretrain_file, map_location='cpu')
+    return {key[12:]: value for key, value in state.items() if key.startswith('transformer')}
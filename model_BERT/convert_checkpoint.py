@@ -0,0 +1,57 @@
+""" Convert a TF BERT checkpoint once into a pytorch file, so training never imports TensorFlow
+
+    python convert_checkpoint.py --checkpoint_file=./model/uncased_L-12_H-768_A-12/bert_model.ckpt
+
+The checkpoint is opened once, with a single reader, and its variables are
+mapped to the transformer parameters with the table of checkpoint.load_model
+(kernels transposed). The output (by default bert_model.pt next to
+bert_model.ckpt, see checkpoint.converted_file) is a state dict of
+'transformer.*' tensors, all views of one flat storage, so torch.load(...,
+mmap=True) maps it in one piece. Trainer.load3 uses it in place of the
+.ckpt file when it exists.
+"""
+
+import os
+import time
+
+import fire
+import torch
+
+import checkpoint
+import models
+
+
+def convert(transformer, checkpoint_file):
+    "{ 'transformer.<name>' : tensor } of a TF checkpoint, the tensors sharing one flat storage"
+    names = dict((param, name) for name, param in transformer.named_parameters())
+    table = checkpoint.conversion_table(transformer)
+    missing = [name for param, name in names.items() if param not in table]
+    assert not missing, 'parameters without a checkpoint variable: %s' % missing
+
+    checkpoint.load_model(transformer, checkpoint_file, checkpoint.open_checkpoint(checkpoint_file))
+    flat = torch.empty(sum(param.numel() for param in table), dtype=torch.float32)
+    state, offset = {}, 0
+    for param in table:
+        view = flat[offset:offset+param.numel()].view(param.size())
+        view.copy_(param.data)
+        state['transformer.' + names[param]] = view
+        offset += param.numel()
+    return state
+
+
+def main(checkpoint_file='./model/uncased_L-12_H-768_A-12/bert_model.ckpt',
+         model_cfg='config/bert_base.json',
+         out=None):
+    """ write the pytorch file of checkpoint_file (default : checkpoint.converted_file(checkpoint_file)) """
+    out = out or checkpoint.converted_file(checkpoint_file)
+    start = time.time()
+    state = convert(models.Transformer(models.Config.from_json(model_cfg)), checkpoint_file)
+    tmp = out + '.tmp'
+    torch.save(state, tmp)
+    os.replace(tmp, out)
+    print('%s : %d tensors, %.1fM parameters, converted in %.1fs' % (
+        out, len(state), sum(v.numel() for v in state.values()) / 1e6, time.time()-start))
+
+
+if __name__ == '__main__':
+    fire.Fire(main)
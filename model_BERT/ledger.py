@@ -0,0 +1,99 @@
+""" Pseudo-label ledger : append-only binary record of every accepted pseudo label """
+
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset, ConcatDataset, Subset
+
+
+RECORD = np.dtype([('row', '<i8'),         # row id in the unlabeled pool
+                   ('label', '<i2'),       # pseudo label
+                   ('round', '<i2'),       # bootstrap round that selected it
+                   ('rule', 'u1'),         # pseudo_label.RULE_* that fired
+                   ('confidence', '<f4')]) # max probability of the models agreeing with the label
+
+
+class Ledger(object):
+    """ Append-only file of pseudo-label records, loaded fully in memory
+
+    Rounds are appended in increasing order, so a round is a contiguous
+    slice and rolling back to round k is a truncation of the file.
+    """
+    def __init__(self, file, reset=False):
+        self.file = file
+        if reset or not os.path.exists(file):
+            open(file, 'wb').close()
+        self.records = np.fromfile(file, dtype=RECORD)
+        if os.path.getsize(file) != self.records.nbytes: # torn last record (crash during an append) : dropped
+            os.truncate(file, self.records.nbytes)
+
+    def __len__(self):
+        return len(self.records)
+
+    def append(self, rows, labels, round, rules, confidence):
+        new = np.zeros(len(rows), dtype=RECORD)
+        new['row'] = rows
+        new['label'] = labels
+        new['round'] = round
+        new['rule'] = rules
+        new['confidence'] = confidence
+        with open(self.file, 'ab') as f:
+            new.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self.records = np.concatenate([self.records, new])
+
+    def _index(self, round):
+        return int(np.searchsorted(self.records['round'], round, side='left'))
+
+    def rounds(self, first=0, last=None):
+        "records of rounds first..last (inclusive), a view"
+        end = len(self.records) if last is None else self._index(last+1)
+        return self.records[self._index(first):end]
+
+    def last_round(self):
+        "round of the last record (0 : no record yet)"
+        return int(self.records['round'][-1]) if len(self.records) else 0
+
+    def rollback(self, round):
+        "drop every record of `round` and later rounds"
+        self.truncate(self._index(round))
+
+    def truncate(self, n_records):
+        "keep the first n_records records (e.g. the ones of a resumed snapshot)"
+        os.truncate(self.file, n_records*RECORD.itemsize)
+        self.records = self.records[:n_records]
+
+
+class PseudoLabeled(Dataset):
+    """ Index view of pool dataset rows with their label replaced by the pseudo label """
+    def __init__(self, dataset, records, label_index=3):
+        self.dataset = dataset
+        self.rows = records['row'].copy()
+        self.labels = torch.tensor(records['label'].astype(np.int64))
+        self.label_index = label_index
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        item = list(self.dataset[self.rows[index]])
+        item[self.label_index] = self.labels[index]
+        return item
+
+
+def replay_sample(n_rows, size, seed):
+    "sorted random sample of `size` row indices out of n_rows (all of them if fewer), the same for the same seed"
+    rng = np.random.RandomState(seed)
+    return np.sort(rng.choice(n_rows, min(size, n_rows), replace=False))
+
+
+class RoundSet(ConcatDataset):
+    """ Training rows of an incremental round : its new pseudo labels, then a replay sample of older rows
+
+    n_new, the number of new rows, sets the epoch budget of the round.
+    """
+    def __init__(self, new, old, replay):
+        super().__init__([new, Subset(old, replay.tolist())])
+        self.n_new = len(new)
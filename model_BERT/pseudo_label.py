@@ -0,0 +1,91 @@
+""" Pseudo labeling of unlabeled sentences from lexicon matches and model confidence """
+
+import multiprocessing
+
+import numpy as np
+import torch
+
+
+RULE_LEXICON = 1       # lexicon winner (3 words) backed by a confident model
+RULE_LEXICON_ALONE = 2 # lexicon winner (4 words)
+RULE_AGREEMENT = 3     # both models agree with confidence
+
+
+def _unique_winner(counts):
+    "class with strictly the most matches (at least one) per row, -1 if none"
+    top, winner = counts.max(1)
+    unique = (top >= 1) & ((counts == top.unsqueeze(1)).sum(1) == 1)
+    return torch.where(unique, winner, torch.full_like(winner, -1))
+
+
+def decide_labels(n3, n4, pred1, conf1, pred2, conf2, confidence=0.9, lexicon_alone=True):
+    """ pseudo labels of a batch (-1 where rejected), the RULE_* that fired and its confidence
+
+    n3, n4 : (B, C) per-class lexicon match counts at 3 and 4 matched words
+    pred1, conf1, pred2, conf2 : (B,) argmax and max probability of both models
+    1. a single class has the most 3-word matches and one model backs it with confidence
+    2. a single class has the most 4-word matches (if lexicon_alone, off for yahoo)
+    3. both models agree with confidence
+    The confidence is the max probability of the models predicting the label.
+    """
+    device = pred1.device
+    n3 = torch.as_tensor(n3, device=device).long()
+    n4 = torch.as_tensor(n4, device=device).long()
+    sure1 = conf1.double() >= confidence # compare as python floats did
+    sure2 = conf2.double() >= confidence
+
+    agree = (pred1 == pred2) & sure1 & sure2
+    labels = torch.where(agree, pred1, torch.full_like(pred1, -1))
+    rules = torch.where(agree, torch.full_like(pred1, RULE_AGREEMENT), torch.zeros_like(pred1))
+    if lexicon_alone:
+        w4 = _unique_winner(n4)
+        labels = torch.where(w4 >= 0, w4, labels)
+        rules = torch.where(w4 >= 0, torch.full_like(rules, RULE_LEXICON_ALONE), rules)
+    w3 = _unique_winner(n3)
+    backed = (w3 >= 0) & (((pred1 == w3) & sure1) | ((pred2 == w3) & sure2))
+    labels = torch.where(backed, w3, labels)
+    rules = torch.where(backed, torch.full_like(rules, RULE_LEXICON), rules)
+
+    label_conf = torch.max(conf1*(pred1 == labels).to(conf1.dtype), conf2*(pred2 == labels).to(conf2.dtype))
+    return labels, rules, label_conf
+
+
+_shared = {} # pool words and lexicon, inherited by forked workers
+
+
+def _label_shard(shard):
+    rows, pred1, conf1, pred2, conf2 = shard
+    pool, lexicon, kwargs = _shared['pool'], _shared['lexicon'], _shared['kwargs']
+    matcher = lexicon.matcher()
+    counts = np.stack([matcher.count(pool.match_words(row)) for row in rows], 1)
+    result = decide_labels(counts[0], counts[1], *(torch.from_numpy(x) for x in (pred1, conf1, pred2, conf2)),
+                           **kwargs)
+    return [x.numpy() for x in result]
+
+
+def label_pool(pool, rows, pred1, conf1, pred2, conf2, lexicon,
+               n_workers=None, shard_size=4096, **kwargs):
+    """ decide_labels over the pool.PoolWords rows `rows` (aligned with the given predictions)
+
+    Matching and decisions are sharded over a pool of forked worker processes;
+    shards are merged back in input order, so the result does not depend on
+    the number of workers.
+    """
+    rows, pred1, conf1, pred2, conf2 = (np.asarray(x) for x in (rows, pred1, conf1, pred2, conf2))
+    shards = [(rows[s:s+shard_size], pred1[s:s+shard_size], conf1[s:s+shard_size],
+               pred2[s:s+shard_size], conf2[s:s+shard_size])
+              for s in range(0, len(rows), shard_size)]
+
+    _shared.update(pool=pool, lexicon=lexicon, kwargs=kwargs)
+    lexicon.matcher() # build before forking so workers inherit it
+    try:
+        if n_workers == 1 or len(shards) <= 1:
+            results = [_label_shard(shard) for shard in shards]
+        else:
+            with multiprocessing.get_context('fork').Pool(n_workers) as workers:
+                results = workers.map(_label_shard, shards)
+    finally:
+        _shared.clear()
+    if not results:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    return tuple(np.concatenate(x) for x in zip(*results))
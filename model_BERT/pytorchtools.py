@@ -1,9 +1,11 @@
+import time
+
 import numpy as np
 import torch
 
 class EarlyStopping:
     """Early stops the training if validation loss doesn't improve after a given patience."""
-    def __init__(self, patience=7, verbose=False, delta=0):
+    def __init__(self, patience=7, verbose=False, delta=0, in_memory=False, writer=None):
         """
         Args:
             patience (int): How long to wait after last time validation loss improved.
@@ -12,15 +14,28 @@ class EarlyStopping:
                             Default: False
             delta (float): Minimum change in the monitored quantity to qualify as an improvement.
                             Default: 0
+            in_memory (bool): If True, the best weights are kept as a CPU copy and only
+                            written to disk by persist() / restore(), once per phase.
+                            Default: False
+            writer (CheckpointWriter): If given, checkpoint files are written by it in the
+                            background instead of by torch.save in the training loop.
+                            Default: None
         """
         self.patience = patience
         self.verbose = verbose
         self.counter = 0
         self.best_score = None
         self.early_stop = False
-        self.val_loss_min = np.Inf
+        self.val_loss_min = np.inf
         self.delta = delta
         self.min_loss= 0
+        self.in_memory = in_memory
+        self.writer = writer
+        self.best_state = None # CPU copy of the best weights (in_memory)
+        self.name = None # checkpoint file of the best weights
+        self.n_saves = 0
+        self.snapshot_time = 0. # seconds spent copying the best weights
+        self.time_saved = 0. # estimated seconds of checkpoint I/O saved, set by persist()
 
     def __call__(self, val_loss, model,name):
 
@@ -47,5 +62,45 @@ class EarlyStopping:
             
             print(f'Validation loss decreased ({self.val_loss_min:.6f} --> {val_loss:.6f}).  Saving model ...')
         self.min_loss = val_loss
-        torch.save(model.state_dict(), name)
+        self.name = name
+        self.n_saves += 1
+        if self.in_memory:
+            start = time.time()
+            self.best_state = {k: v.detach().to('cpu', copy=True) for k, v in model.state_dict().items()}
+            self.snapshot_time += time.time()-start
+        elif self.writer is not None:
+            self.writer.save(model.state_dict(), name)
+        else:
+            torch.save(model.state_dict(), name)
+
+    def persist(self):
+        """ write the in-memory best weights to their checkpoint file (end of a phase)
+
+        Sets time_saved : the writes the in-memory updates replaced (timed by
+        this write), minus the time spent copying the weights and waiting for
+        this write. With a writer, persist() waits for this write to be done.
+        """
+        if self.best_state is None:
+            return
+        start = time.time()
+        if self.writer is not None:
+            self.writer.save(self.best_state, self.name, copy=False) # best_state is replaced, never modified
+            write_time = self.writer.wait(self.name) # this write, not the previous one of the file
+        else:
+            torch.save(self.best_state, self.name)
+            write_time = time.time()-start
+        self.time_saved = self.n_saves*write_time - self.snapshot_time - (time.time()-start)
+        if self.verbose:
+            print(f'EarlyStopping: {self.n_saves} best-model updates kept in memory, '
+                  f'about {self.time_saved:.1f}s of checkpoint writes saved')
+
+    def restore(self, model):
+        "load the best weights back into the model, persisting them first if kept in memory"
+        if self.in_memory:
+            self.persist()
+            model.load_state_dict(self.best_state)
+        else:
+            if self.writer is not None:
+                self.writer.flush()
+            model.load_state_dict(torch.load(self.name, map_location=next(model.parameters()).device))
         
\ No newline at end of file
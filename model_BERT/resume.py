@@ -0,0 +1,85 @@
+""" Crash-safe snapshots of a bootstrap trial at phase boundaries, to resume it after a crash """
+
+import os
+import random
+
+import numpy as np
+import torch
+
+
+LAST_PHASES = ('lstm', 'pseudo_label') # phases that end an epoch (retraining / labeling one)
+
+
+class RunSnapshot(object):
+    """ Snapshot file of a bootstrap trial, rewritten after every phase
+
+    A phase is 'cnn' or 'lstm' training, 'lexicon' mining or 'pseudo_label'.
+    The file holds the trainer state (Trainer.state_dict()), the epoch and
+    its last completed phase, the trainer counters, the RNG states and the
+    bootstrap state returned by get_state() (tensors and plain values). It
+    is written to a temporary name, synced and renamed, so a crash leaves
+    the previous snapshot. load() hands the bootstrap state back to
+    set_state(state), which rebuilds the retraining and pool loaders.
+    """
+    def __init__(self, file, get_state, set_state):
+        self.file = file
+        self.get_state = get_state
+        self.set_state = set_state
+
+    def exists(self):
+        return os.path.exists(self.file)
+
+    def remove(self):
+        "drop the snapshot of an earlier run (a fresh trial draws a new split)"
+        if self.exists():
+            os.remove(self.file)
+
+    def _write(self, state):
+        tmp = self.file + '.tmp'
+        with open(tmp, 'wb') as f:
+            torch.save(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.file)
+
+    def save(self, trainer, e, phase, counters):
+        "snapshot after `phase` of epoch e"
+        np_state = np.random.get_state()
+        self._write({'epoch': e,
+                     'phase': phase,
+                     'counters': counters,
+                     'trainer': trainer.state_dict(),
+                     'bootstrap': self.get_state(),
+                     'rng': {'random': random.getstate(),
+                             'numpy': (np_state[0], torch.from_numpy(np_state[1].astype(np.int64))) + np_state[2:],
+                             'torch': torch.get_rng_state(),
+                             'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else []}})
+
+    def finish(self):
+        "mark the trial completed (the models are not kept)"
+        self._write({'phase': 'done'})
+
+    def completed(self):
+        return self.exists() and torch.load(self.file, map_location='cpu')['phase'] == 'done'
+
+    def load(self, trainer):
+        """ restore the trainer, the bootstrap state and the RNGs from the snapshot
+
+        Returns the epoch to start from, the phase of it already completed
+        (None : the whole epoch is to run), the trainer counters and the
+        loaders returned by set_state().
+        """
+        state = torch.load(self.file, map_location='cpu')
+        trainer.load_state_dict(state['trainer'])
+        loaders = self.set_state(state['bootstrap'])
+        rng = state['rng']
+        random.setstate(rng['random'])
+        np.random.set_state((rng['numpy'][0], rng['numpy'][1].numpy().astype(np.uint32)) + tuple(rng['numpy'][2:]))
+        torch.set_rng_state(rng['torch'])
+        if rng['cuda'] and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(rng['cuda'])
+        e, phase = state['epoch'], state['phase']
+        print('resuming %s : epoch %d, after %s' % (self.file, e+1, phase))
+        if phase in LAST_PHASES:
+            e, phase = e+1, None
+        return e, phase, state['counters'], loaders
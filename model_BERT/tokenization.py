@@ -3,7 +3,9 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import os
 import unicodedata
+import warnings
 import six
 import gensim
 import random
@@ -15,7 +17,25 @@ from gensim.scripts.glove2word2vec import glove2word2vec
 
 #glove2word2vec('glove.42B.300d.txt', 'word2vec.txt')
 #embed_lookup = KeyedVectors.load_word2vec_format("word2vec.txt")
-embed_lookup = KeyedVectors.load_word2vec_format("/home/hyeontae/KETI/temp/Sample/word2vec_BERT.txt")
+EMBEDDINGS_FILE = "/home/hyeontae/KETI/temp/Sample/word2vec_BERT.txt"
+# scheduler.py sets SALNET_SHARED_EMBEDDINGS : the vectors are then saved once in gensim's
+# native format and memory-mapped read-only, so parallel trials share their pages (and a
+# worker's RLIMIT_DATA, which charges private writable mappings only, does not count them)
+SHARED_EMBEDDINGS = os.environ.get('SALNET_SHARED_EMBEDDINGS')
+embed_lookup = None # read by load_embeddings() on first use
+
+def load_embeddings():
+    """ the word vectors, read on first use : runs whose tokenized sets and
+    embedding come from the artifact cache never read EMBEDDINGS_FILE """
+    global embed_lookup
+    if embed_lookup is None:
+        if SHARED_EMBEDDINGS and os.path.exists(SHARED_EMBEDDINGS):
+            embed_lookup = KeyedVectors.load(SHARED_EMBEDDINGS, mmap='r')
+        else:
+            embed_lookup = KeyedVectors.load_word2vec_format(EMBEDDINGS_FILE)
+            if SHARED_EMBEDDINGS:
+                embed_lookup.save(SHARED_EMBEDDINGS)
+    return embed_lookup
 
 def convert_to_unicode(text):
     """Converts `text` to Unicode (if it's not already), assuming utf-8 input."""
@@ -80,10 +100,11 @@ def load_vocab(vocab_file):
 
 def convert_tokens_to_ids(tokens):
     """Converts a sequence of tokens into ids using the vocab."""
+    vocab = load_embeddings().wv.vocab
     ids = []
     for token in tokens:
         try:
-            ids.append(embed_lookup.wv.vocab[token].index)
+            ids.append(vocab[token].index)
         except:
             ids.append(0)
     return ids
@@ -96,6 +117,11 @@ def convert_tokens_to_ids1(vocab, tokens):
     return ids
 
 def embed_lookup2():
+    embed_lookup = load_embeddings()
+    if SHARED_EMBEDDINGS: # no copy : the embedding is frozen, the read-only mapped pages are never written
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning) # torch warns about the non-writable array
+            return torch.from_numpy(embed_lookup.vectors)
     weights = list()
     #for i in range(0, len(embed_lookup.wv.vocab)):
     for i in range(0, len(embed_lookup.wv.vocab)):
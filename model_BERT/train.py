@@ -1,5 +1,6 @@
 import os
 import json
+import time
 from typing import NamedTuple
 from tqdm import tqdm
 import checkpoint
@@ -12,24 +13,132 @@ import torch.nn.functional as F
 from sklearn.metrics import precision_score, recall_score,f1_score, accuracy_score
 from random import randint
 from pytorchtools import EarlyStopping
+from checkpoint_writer import CheckpointWriter
 from transformers import AdamW, get_linear_schedule_with_warmup 
 
 
+BERT_LR = 1e-5 # learning rate of the AdamW of every BERT fit
+ROUND0_PATIENCE = (10, 30) # early stopping patience of the round-0 supervised fits : BERT, the LSTM
+
+# Config fields that change how fast a run trains, not what it trains (left out of the round-0 cache key)
+RUNTIME_FIELDS = ('device', 'cpu_threads', 'cpu_interop_threads', 'cpu_cores', 'progress_interval',
+                  'checkpoint_queue', 'artifact_cache', 'phase_snapshots', 'infer_batch_size')
+
+
+PRETRAINED = {} # pretrain_file -> state dict of its pretrained transformer, converted once per process
+
+
+def pretrained_state(transformer, pretrain_file):
+    """ state dict (CPU tensors) of the pretrained transformer in pretrain_file
+
+    The checkpoint is read (and a TF one converted, into `transformer`) on
+    the first call only : the state is kept for the process, so the later
+    rounds and trials copy from it. Treat it as read-only. A TF checkpoint
+    converted by convert_checkpoint.py is mapped from its pytorch file
+    instead, without importing TensorFlow.
+    """
+    state = PRETRAINED.get(pretrain_file)
+    if state is None:
+        file = pretrain_file
+        if file.endswith('.ckpt') and os.path.exists(checkpoint.converted_file(file)): # see convert_checkpoint.py
+            file = checkpoint.converted_file(file)
+            print('Using the converted checkpoint', file)
+        if file.endswith('.ckpt'): # checkpoint file in tensorflow, one reader for all its variables
+            checkpoint.load_model(transformer, file, checkpoint.open_checkpoint(file))
+            state = {key: value.detach().cpu().clone() for key, value in transformer.state_dict().items()}
+        elif file.endswith('.pt'): # pretrain model file in pytorch, memory-mapped
+            state = checkpoint.load_transformer(file) # only transformer parts
+        else:
+            return None
+        PRETRAINED[pretrain_file] = state
+    return state
+
+
 class Config(NamedTuple):
     """ Hyperparameters for training """
     seed: int = 3431 # random seed
     batch_size: int = 128
+    infer_batch_size: int = 128 # batches of the unlabeled pool (inference only : the scores of a row do not depend on its batch)
     lr: int = 1e-3 # learning rate
     n_epochs: int = 100 # the number of epoch
     warmup: float = 0.1
     save_steps: int = 100 # interval for saving model
     total_steps: int = 100000 # total number of steps to train
+    device: str = "" # 'cpu', 'cuda', 'cuda:1'... ("" : GPU if available)
+    cpu_threads: int = 0 # intra-op threads (0 : torch default)
+    cpu_interop_threads: int = 0 # inter-op threads (0 : torch default)
+    cpu_cores: str = "" # pin the process to these cores, e.g. '0-7' ("" : no pinning)
+    progress_interval: float = 1.0 # seconds between progress bar loss updates
+    best_in_memory: bool = True # early stopping keeps the best weights in memory, written once per phase
+    checkpoint_queue: int = 2 # checkpoint writes queued on a background thread before training waits (0 : write in the loop)
+    artifact_cache: str = "" # directory of the stage cache (see stages.ArtifactCache, "" : off)
+    incremental_rounds: bool = False # later rounds go on from the last weights, on the round's new pseudo labels plus a replay sample
+    replay_size: int = 1000 # older rows (labeled and earlier pseudo labels) replayed in an incremental round
+    rows_per_epoch: int = 1000 # epoch budget of an incremental round : one epoch per rows_per_epoch new rows (at least one)
+    phase_snapshots: bool = True # rewrite ./temp_data/resume_<tag>_<trial>.pt after every phase (needed by resume)
 
     @classmethod
     def from_json(cls, file): # load config from json file
         return cls(**json.load(open(file, "r")))
 
 
+class RunningMetrics(object):
+    """ Running sums of a loop kept on the device : batch losses, correct predictions, samples
+
+    add() queues device ops only, so a step does not wait for the host. The
+    sums are read (one host sync) when the loop ends, e.g. once per epoch.
+    """
+    def __init__(self, device):
+        self.loss_sum = torch.zeros((), device=device) # sum of batch losses
+        self.sample_loss_sum = torch.zeros((), device=device) # sum of batch losses times batch size
+        self.correct = torch.zeros((), dtype=torch.long, device=device)
+        self.steps = 0
+        self.samples = 0
+
+    def add(self, loss, outputs=None, targets=None):
+        loss = loss.detach()
+        self.loss_sum += loss
+        self.steps += 1
+        if targets is not None:
+            self.sample_loss_sum += loss * targets.size(0)
+            self.samples += targets.size(0)
+            self.correct += (outputs.detach().argmax(1) == targets).sum()
+
+    def average_loss(self):
+        "mean of the batch losses"
+        return self.loss_sum.item()/max(self.steps, 1)
+
+    def sample_loss(self):
+        "mean loss per sample"
+        return self.sample_loss_sum.item()/max(self.samples, 1)
+
+    def accuracy(self):
+        return self.correct.item()/max(self.samples, 1)
+
+
+class Progress(object):
+    """ tqdm bar whose loss description is refreshed at most every `interval` seconds
+
+    Reading the loss is a host sync, so it only happens on a refresh.
+    """
+    def __init__(self, iterable, interval=1.0, desc='Iter (loss=X.XXX)', **kwargs):
+        self.bar = tqdm(iterable, desc=desc, **kwargs)
+        self.interval = interval
+        self.last = time.time()
+
+    def __iter__(self):
+        return iter(self.bar)
+
+    def __len__(self):
+        return len(self.bar)
+
+    def report(self, loss):
+        now = time.time()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.bar.set_description('Iter (loss=%5.3f)'%loss.item())
+
+
 class Trainer(object):
     """Training Helper Class"""
     def __init__(self, cfg, dataName,stopNum,model,model2, data_iter,data_iter_b, data_iter2,data_iter2_b, data_iter3,data_iter3_b, dataset_dev, dataset_dev_b, optimizer, optimizer2,device,kkk):
@@ -52,12 +161,32 @@ class Trainer(object):
         self.optimizer = optimizer
         self.optimizer2 =optimizer2
         self.device = device # device name
+        self.writer = CheckpointWriter(cfg.checkpoint_queue) if cfg.checkpoint_queue else None
         self.kkk = kkk
 
     
-    def train(self, model_file, pretrain_file, get_loss_CNN, get_loss_Attn_LSTM, evalute_CNN_SSL, pseudo_labeling,evalute_Attn_LSTM,evalute_CNN,evalute_Attn_LSTM_SSL, generating_lexiocn, data_parallel=False):
+    def train(self, model_file, pretrain_file, get_loss_CNN, get_loss_Attn_LSTM, evalute_CNN_SSL, pseudo_labeling, evalute_Attn_LSTM_SSL, generating_lexiocn, data_parallel=False, score_unlabeled=None,
+              snapshot=None, resume=False, round0=None):
      
-        """ Train Loop """
+        """ Train Loop
+
+        If score_unlabeled is given, every odd epoch runs it once over the pool
+        (a batch of each pipeline at a time, storing the model outputs), then
+        generating_lexiocn(e) and pseudo_labeling(e) run from the stored
+        outputs. Otherwise lexicon mining, BERT scoring and pseudo labeling
+        each run their own pass over the pool.
+
+        If snapshot (a resume.RunSnapshot) is given, it is rewritten after
+        every phase, and resume=True restarts from its last completed phase.
+        If round0 (a stages.Entry) holds the state of round-0 models trained
+        on the same data, they are loaded instead of trained, else stored.
+
+        With Config.incremental_rounds, the retraining rounds go on from the
+        weights of the last round (BERT is not reloaded) for an epoch budget
+        set by the size of the round (see round_epochs) : the retraining
+        loaders then hold the round's new pseudo labels and a replay sample
+        of older rows (ledger.RoundSet).
+        """
         self.model.train() # train mode
         self.load3(model_file, pretrain_file)
         
@@ -88,6 +217,11 @@ class Trainer(object):
             cnn_save_name = "./yahoo_model_save/checkpoint_CNN"+str(t)+".pt"
             result_name = "./result/result_yahoo.txt"
             pseudo_name = "./result/pseudo_train_set_yahoo.txt"
+        else: # any other registered dataset
+            rnn_save_name = "./"+self.dataName+"_model_save/checkpoint_RNN"+str(t)+".pt"
+            cnn_save_name = "./"+self.dataName+"_model_save/checkpoint_CNN"+str(t)+".pt"
+            result_name = "./result/result_"+self.dataName+".txt"
+            pseudo_name = "./result/pseudo_train_set_"+self.dataName+".txt"
 
         
         print("result########:", result_name)
@@ -99,113 +233,109 @@ class Trainer(object):
         before = -50
         curTemp=0
         print("self.cfg.n_epochs#:", self.cfg.n_epochs)
-        ddf = open(result_name,'a', encoding='UTF8')
-        ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
-        ddf.close()
-        
-        ddf = open(pseudo_name,'a', encoding='UTF8')
-        ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
-        ddf.close()
+        start, done = 0, None # epoch to start from, phase of it already done
+        if resume:
+            start, done, counters, loaders = snapshot.load(self)
+            num_a, curTemp = counters['num_a'], counters['curTemp']
+            self.data_iter_temp, self.data_iter_temp_b, self.data_iter, self.data_iter_b = loaders
+        else:
+            ddf = open(result_name,'a', encoding='UTF8')
+            ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
+            ddf.close()
+
+            ddf = open(pseudo_name,'a', encoding='UTF8')
+            ddf.write("############################################"+str(t)+": ramdom_samplimg###########################################"+'\n')
+            ddf.close()
                 
-        for e in range(self.cfg.n_epochs):
+        for e in range(start, self.cfg.n_epochs):
+            skip, done = done, None # phase of a resumed epoch already done
             if(e==0):
-                temp=987654321
-                early_stopping = EarlyStopping(patience=10, verbose=True)
-                valid_losses = []
-                self.optimizer = AdamW(model.parameters(), lr=1e-5, correct_bias = True)
+                time_saved = 0. # checkpoint I/O saved by in-memory early stopping this round
+                if skip is None and round0 is not None and round0.exists(): # round-0 models of an earlier run
+                    self.load_state_dict(round0.load())
+                    self._save(model2.state_dict(), "./model_save/checkpoint_LSTM_real.pt")
+                    for m, forward, data_iter in ((model, evalute_CNN_SSL, self.data_iter2_b), (model2, evalute_Attn_LSTM_SSL, self.data_iter2)):
+                        metrics = self.evaluate(m, forward, data_iter)
+                        ddf = open(result_name,'a', encoding='UTF8')
+                        ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(metrics.accuracy())+'\n')
+                        ddf.close()
+                        num_a+=1
+                    self.flush()
+                    self._snapshot(snapshot, e, 'lstm', num_a, curTemp)
+                    continue
+                if skip != 'cnn':
+                    temp=987654321
+                    early_stopping = EarlyStopping(patience=ROUND0_PATIENCE[0], verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
+                    self.optimizer = AdamW(model.parameters(), lr=BERT_LR, correct_bias = True)
                 
-                while(1):
-                    global_step = 0 # global iteration steps regardless of epochs
-                    global_step3 = 0
-                    loss_sum = 0. # the sum of iteration losses to get average loss in every epoch
-                    iter_bar = tqdm(self.data_iter3_b, desc='Iter (loss=X.XXX)')
-                    model.train()
-                    for i, batch in enumerate(iter_bar):
-                        batch = [t.to(self.device) for t in batch]
+                    while(1):
+                        global_step = 0 # global iteration steps regardless of epochs
+                        global_step3 = 0
+                        metrics = RunningMetrics(self.device)
+                        iter_bar = Progress(self.data_iter3_b, self.cfg.progress_interval)
+                        model.train()
+                        for i, batch in enumerate(iter_bar):
+                            batch = [t.to(self.device) for t in batch]
 
-                        self.optimizer.zero_grad()
-                        loss = get_loss_CNN(model, batch, global_step).mean() # mean() for Data Parallelism
-                        loss.backward()
-                        self.optimizer.step()
+                            self.optimizer.zero_grad()
+                            loss = get_loss_CNN(model, batch, global_step).mean() # mean() for Data Parallelism
+                            loss.backward()
+                            self.optimizer.step()
 
-                        global_step += 1
-                        loss_sum += loss.item()
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
+                            global_step += 1
+                            metrics.add(loss)
+                            iter_bar.report(loss)
 
 
 
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    model.eval()# evaluation mode
+                        print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                        model.eval()# evaluation mode
 
-                    loss_sum = 0.
-                    global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev_b, desc='Iter (loss=X.XXX)')
+                        metrics = RunningMetrics(self.device)
+                        global_step3 = 0
+                        iter_bar_dev = Progress(self.dataset_dev_b, self.cfg.progress_interval)
             
-                    for i, batch in enumerate(iter_bar_dev):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_CNN(model, batch,global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
+                        for i, batch in enumerate(iter_bar_dev):
+                            batch = [t.to(self.device) for t in batch]
+                            loss = get_loss_CNN(model, batch,global_step3).mean() # mean() for Data Parallelism
+                            global_step3 += 1
+                            metrics.add(loss)
+                            iter_bar_dev.report(loss)
 
 
 
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
+                        print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
 
-                    valid_loss = np.average(valid_losses)
-                    loss_min=early_stopping(valid_loss, model,"./model_save/checkpoint_BERT_real.pt")
-                    valid_losses = []
+                        valid_loss = metrics.average_loss()
+                        loss_min=early_stopping(valid_loss, model,"./model_save/checkpoint_BERT_real.pt")
 
-                    if early_stopping.early_stop:
-                        print("Early stopping")
-                        break
+                        if early_stopping.early_stop:
+                            print("Early stopping")
+                            break
 
  
                         
-                model.load_state_dict(torch.load("./model_save/checkpoint_BERT_real.pt"))
-                print("Early stopping")
-                model.eval()# evaluation mode
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                
-                global_step = 0
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2_b, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                        label_id, y_pred1 = evalute_CNN(model, batch) # accuracy to print
-                        loss = get_loss_CNN(model, batch,global_step).mean() # mean() for Data Parallelism
-                        targets, outputs = evalute_CNN(model, batch) # accuracy to print
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                        
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
-                ddf = open(result_name,'a', encoding='UTF8')
-                ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
-                ddf.close()
-                num_a+=1
+                    early_stopping.restore(model)
+                    time_saved += early_stopping.time_saved
+                    print("Early stopping")
+                    model.eval()# evaluation mode
+                    metrics = self.evaluate(model, evalute_CNN_SSL, self.data_iter2_b)
+                    acc_total = metrics.accuracy()
+                    loss_total = metrics.sample_loss()
+                    ddf = open(result_name,'a', encoding='UTF8')
+                    ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
+                    ddf.close()
+                    num_a+=1
+                    self._snapshot(snapshot, e, 'cnn', num_a, curTemp)
                 
   
                 temp=987654321
-                early_stopping = EarlyStopping(patience=30, verbose=True)
-                valid_losses = []
+                early_stopping = EarlyStopping(patience=ROUND0_PATIENCE[1], verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
                 while(1):
                     model2.train()
-                    loss_sum = 0
+                    metrics = RunningMetrics(self.device)
                     global_step3 = 0
-                    iter_bar3 = tqdm(self.data_iter3, desc='Iter (loss=X.XXX)')
+                    iter_bar3 = Progress(self.data_iter3, self.cfg.progress_interval)
                     for i, batch in enumerate(iter_bar3):
                         batch = [t.to(self.device) for t in batch]
                         loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
@@ -213,102 +343,105 @@ class Trainer(object):
                         loss.backward()
                         self.optimizer2.step()
                         global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar3.set_description('Iter (loss=%5.3f)'%loss.item())
+                        metrics.add(loss)
+                        iter_bar3.report(loss)
 
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
+                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
                     model2.eval()
-                    loss_sum = 0.
+                    metrics = RunningMetrics(self.device)
                     global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev, desc='Iter (loss=X.XXX)')
+                    iter_bar_dev = Progress(self.dataset_dev, self.cfg.progress_interval)
                     for i, batch in enumerate(iter_bar_dev):
                         batch = [t.to(self.device) for t in batch]
                         loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
                         global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
+                        metrics.add(loss)
+                        iter_bar_dev.report(loss)
 
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    valid_loss = np.average(valid_losses)
+                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                    valid_loss = metrics.average_loss()
                     loss_min=early_stopping(valid_loss, model2,"./model_save/checkpoint_LSTM_real.pt")
-                    valid_losses = []
                     if early_stopping.early_stop:
                         print("Early stopping")
                         break
 
+                early_stopping.persist()
+                time_saved += early_stopping.time_saved
+                if round0 is not None:
+                    round0.save(self.state_dict())
+
                 
                 model2.eval()
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                
-                global_step = 0
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                    
-                    
-                        loss = get_loss_Attn_LSTM(model2, batch, global_step).mean() # mean() for Data Parallelism
-                        targets, outputs = evalute_Attn_LSTM(model2, batch, global_step3,len(iter_bar))# accuracy to print
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
+                metrics = self.evaluate(model2, evalute_Attn_LSTM_SSL, self.data_iter2)
+                acc_total = metrics.accuracy()
+                loss_total = metrics.sample_loss()
                 ddf = open(result_name,'a', encoding='UTF8')
                 ddf.write(str(t)+": "+str(num_a)+"aucr: "+str(acc_total)+'\n')
                 ddf.close()
                 num_a+=1
+                if self.cfg.best_in_memory:
+                    print('Epoch %d : about %.1fs of checkpoint I/O saved by in-memory early stopping'%(e+1, time_saved))
+                self.flush() # end of the round : every checkpoint is on disk
+                self._snapshot(snapshot, e, 'lstm', num_a, curTemp)
                 
 
                 
             elif(e%2==1):
-                global_step1 = 0
-                model2.eval()
-                labell=[]
-                iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
-                for batch in iter_bar:
-                    batch = [t.to(self.device) for t in batch]
-                    with torch.no_grad(): # evaluation without gradient calculation
-                        label_id, y_pred1 = generating_lexiocn(model2, batch,global_step1,len(iter_bar),e) # accuracy to print
-                        global_step1+=1
+                if score_unlabeled is not None:
+                    sen = []
+                    if skip != 'lexicon':
+                        global_step1 = 0
+                        model.eval()
+                        model2.eval()
+                        # both pool loaders yield the same rows in the same order
+                        iter_bar = tqdm(zip(self.data_iter, self.data_iter_b), total=len(self.data_iter), desc='Iter (scoring)')
+                        for batch, batch_b in iter_bar:
+                            batch = [t.to(self.device) for t in batch]
+                            batch_b = [t.to(self.device) for t in batch_b]
+                            with torch.no_grad(): # evaluation without gradient calculation
+                                score_unlabeled(model, model2, batch, batch_b, global_step1, len(iter_bar), e)
+                                global_step1+=1
+
+                        generating_lexiocn(e)
+                        self._snapshot(snapshot, e, 'lexicon', num_a, curTemp)
+                    result_label,result3,data_temp, data_temp_b, data_iter_temp_na, data_iter_temp_na_b = pseudo_labeling(e)
+                else:
+                    global_step1 = 0
+                    model2.eval()
+                    labell=[]
+                    iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
+                    for batch in iter_bar:
+                        batch = [t.to(self.device) for t in batch]
+                        with torch.no_grad(): # evaluation without gradient calculation
+                            label_id, y_pred1 = generating_lexiocn(model2, batch,global_step1,len(iter_bar),e) # accuracy to print
+                            global_step1+=1
                         
                         
                         
                         
-                global_step1 = 0
-                model.eval()
-                labell=[]
-                iter_bar = tqdm(self.data_iter_b, desc='Iter (loss=X.XXX)')
-                for batch in iter_bar:
-                    batch = [t.to(self.device) for t in batch]
-                    with torch.no_grad(): # evaluation without gradient calculation
-                        label_id, y_pred1 = evalute_CNN_SSL(model, batch,global_step1) # accuracy to print
-                        global_step1+=1
+                    global_step1 = 0
+                    model.eval()
+                    labell=[]
+                    iter_bar = tqdm(self.data_iter_b, desc='Iter (loss=X.XXX)')
+                    for batch in iter_bar:
+                        batch = [t.to(self.device) for t in batch]
+                        with torch.no_grad(): # evaluation without gradient calculation
+                            label_id, y_pred1 = evalute_CNN_SSL(model, batch,global_step1) # accuracy to print
+                            global_step1+=1
                         
                         
                 
-                global_step1 = 0
+                    global_step1 = 0
 
-                model2.eval()
-                sen = []
-                labell=[]
-                iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
-                for batch in iter_bar:
-                    batch = [t.to(self.device) for t in batch]
-                    with torch.no_grad(): # evaluation without gradient calculation
-                        label_id, y_pred1,result_label,result3,data_temp, data_temp_b, data_iter_temp_na, data_iter_temp_na_b = pseudo_labeling( model2,batch,global_step1,len(iter_bar),e) # accuracy to print
-                        global_step1+=1
+                    model2.eval()
+                    sen = []
+                    labell=[]
+                    iter_bar = tqdm(self.data_iter, desc='Iter (loss=X.XXX)')
+                    for batch in iter_bar:
+                        batch = [t.to(self.device) for t in batch]
+                        with torch.no_grad(): # evaluation without gradient calculation
+                            label_id, y_pred1,result_label,result3,data_temp, data_temp_b, data_iter_temp_na, data_iter_temp_na_b = pseudo_labeling( model2,batch,global_step1,len(iter_bar),e) # accuracy to print
+                            global_step1+=1
         
                 self.data_iter_temp = data_temp
                 self.data_iter_temp_b = data_temp_b
@@ -344,112 +477,95 @@ class Trainer(object):
                     curTemp=0
                 if(curTemp>=2):
                     break
+                self._snapshot(snapshot, e, 'pseudo_label', num_a, curTemp)
           
 
                     
 
             elif(e%2==0 ):
-                self.model.train() # train mode
-                self.load3(model_file, pretrain_file)
-                model = self.model.to(self.device)
+                time_saved = 0. # checkpoint I/O saved by in-memory early stopping this round
+                if skip != 'cnn':
+                    self.model.train() # train mode
+                    if not self.cfg.incremental_rounds:
+                        self.load3(model_file, pretrain_file)
+                    model = self.model.to(self.device)
+                    max_epochs = self.round_epochs(self.data_iter_temp_b)
         
-                b=0
-                early_stopping = EarlyStopping(patience=1, verbose=True)
-                valid_losses = []
-                bb=987654321
+                    b=0
+                    early_stopping = EarlyStopping(patience=1, verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
+                    bb=987654321
                 
-                self.optimizer = AdamW(model.parameters(), lr=1e-5, correct_bias = True)
+                    self.optimizer = AdamW(model.parameters(), lr=BERT_LR, correct_bias = True)
                 
-                while(1):
-                    iter_bar = tqdm(self.data_iter_temp_b, desc='Iter (loss=X.XXX)')
-                    model.train()
-                    global_step = 0 
-                    global_step3 = 0
-                    valid_losses2 = []
-                    for i, batch in enumerate(iter_bar):
-                        batch = [t.to(self.device) for t in batch]
-                        self.optimizer.zero_grad()
-                        loss = get_loss_CNN(model, batch, global_step).mean() # mean() for Data Parallelism
-                        valid_losses2.append(loss.item())
-                        loss.backward()
-                        self.optimizer.step()
-                        global_step += 1
-                        loss_sum += loss.item()
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    valid_loss2 = np.average(valid_losses2)
-                    bb= min(bb, valid_loss2.item())
+                    while(1):
+                        iter_bar = Progress(self.data_iter_temp_b, self.cfg.progress_interval)
+                        model.train()
+                        global_step = 0 
+                        global_step3 = 0
+                        metrics = RunningMetrics(self.device)
+                        for i, batch in enumerate(iter_bar):
+                            batch = [t.to(self.device) for t in batch]
+                            self.optimizer.zero_grad()
+                            loss = get_loss_CNN(model, batch, global_step).mean() # mean() for Data Parallelism
+                            loss.backward()
+                            self.optimizer.step()
+                            global_step += 1
+                            metrics.add(loss)
+                            iter_bar.report(loss)
+
+                        print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                        valid_loss2 = metrics.average_loss()
+                        bb= min(bb, valid_loss2)
                                
-                    valid_losses2 = []
-                    model.eval()# evaluation mode
-                    loss_sum = 0.
-                    global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev_b, desc='Iter (loss=X.XXX)')
+                        model.eval()# evaluation mode
+                        metrics = RunningMetrics(self.device)
+                        global_step3 = 0
+                        iter_bar_dev = Progress(self.dataset_dev_b, self.cfg.progress_interval)
             
-                    for i, batch in enumerate(iter_bar_dev):
-                        batch = [t.to(self.device) for t in batch]
-                        loss = get_loss_CNN(model, batch,global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
-                        global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
-
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-
-                    valid_loss = np.average(valid_losses)
-                    loss_min=early_stopping(valid_loss, model,cnn_save_name)
-                    valid_losses = []
-
-                    if early_stopping.early_stop:
-                        print("Early stopping")
-                        break
+                        for i, batch in enumerate(iter_bar_dev):
+                            batch = [t.to(self.device) for t in batch]
+                            loss = get_loss_CNN(model, batch,global_step3).mean() # mean() for Data Parallelism
+                            global_step3 += 1
+                            metrics.add(loss)
+                            iter_bar_dev.report(loss)
+
+                        print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+
+                        valid_loss = metrics.average_loss()
+                        loss_min=early_stopping(valid_loss, model,cnn_save_name)
+
+                        if early_stopping.early_stop:
+                            print("Early stopping")
+                            break
+                        b+=1
+                        if max_epochs is not None and b >= max_epochs:
+                            print("Epoch budget of the round reached (%d)" % max_epochs)
+                            break
    
-                model.load_state_dict(torch.load(cnn_save_name))
+                    early_stopping.restore(model)
+                    time_saved += early_stopping.time_saved
                
-                model.eval()# evaluation mode
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                
-                global_step = 0
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2_b, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                    
-                        label_id, y_pred1 = evalute_CNN(model, batch) # accuracy to print
-                        loss = get_loss_CNN(model, batch,global_step).mean() # mean() for Data Parallelism
-                        targets, outputs = evalute_CNN(model, batch) # accuracy to print
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                        
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
-                ddf = open(result_name,'a', encoding='UTF8')
-                ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
-                ddf.close()
-                num_a+=1
+                    model.eval()# evaluation mode
+                    metrics = self.evaluate(model, evalute_CNN_SSL, self.data_iter2_b)
+                    acc_total = metrics.accuracy()
+                    loss_total = metrics.sample_loss()
+                    ddf = open(result_name,'a', encoding='UTF8')
+                    ddf.write(str(t)+": "+ str(num_a)+"aucr: "+str(acc_total)+'\n')
+                    ddf.close()
+                    num_a+=1
+                    self._snapshot(snapshot, e, 'cnn', num_a, curTemp)
      
-                valid_losses = []            
                 temp = 987654321
-                early_stopping = EarlyStopping(patience=10, verbose=True)
+                early_stopping = EarlyStopping(patience=10, verbose=True, in_memory=self.cfg.best_in_memory, writer=self.writer)
+                max_epochs = self.round_epochs(self.data_iter_temp)
+                b=0
                 while(1):
                     model2.train()
                     l=0
                     l_sum=0
-                    loss_sum = 0
+                    metrics = RunningMetrics(self.device)
                     global_step3 = 0
-                    iter_bar3 = tqdm(self.data_iter_temp, desc='Iter (loss=X.XXX)')
+                    iter_bar3 = Progress(self.data_iter_temp, self.cfg.progress_interval)
                     for i, batch in enumerate(iter_bar3):
                         batch = [t.to(self.device) for t in batch]
                         loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
@@ -457,113 +573,163 @@ class Trainer(object):
                         loss.backward()
                         self.optimizer2.step()
                         global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar3.set_description('Iter (loss=%5.3f)'%loss.item())
+                        metrics.add(loss)
+                        iter_bar3.report(loss)
 
                      
                         
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
+                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
                     model2.eval()
-                    loss_sum = 0.
+                    metrics = RunningMetrics(self.device)
                     global_step3 = 0
-                    iter_bar_dev = tqdm(self.dataset_dev, desc='Iter (loss=X.XXX)')
+                    iter_bar_dev = Progress(self.dataset_dev, self.cfg.progress_interval)
                     for i, batch in enumerate(iter_bar_dev):
                         batch = [t.to(self.device) for t in batch]
                         loss = get_loss_Attn_LSTM(model2, batch, global_step3).mean() # mean() for Data Parallelism
-                        valid_losses.append(loss.item())
                         global_step3 += 1
-                        loss_sum += loss.item()
-                        iter_bar_dev.set_description('Iter (loss=%5.3f)'%loss.item())
+                        metrics.add(loss)
+                        iter_bar_dev.report(loss)
 
                        
 
-                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, loss_sum/(i+1)))
-                    valid_loss = np.average(valid_losses)
+                    print('Epoch %d/%d : Average Loss %5.3f'%(e+1, self.cfg.n_epochs, metrics.average_loss()))
+                    valid_loss = metrics.average_loss()
                     loss_min=early_stopping(valid_loss, model2,rnn_save_name)
-                    valid_losses = []
 
                     if early_stopping.early_stop:
                         print("Early stopping")
                         break
+                    b+=1
+                    if max_epochs is not None and b >= max_epochs:
+                        print("Epoch budget of the round reached (%d)" % max_epochs)
+                        break
 
-                model2.load_state_dict(torch.load(rnn_save_name))   
+                early_stopping.restore(model2)
+                time_saved += early_stopping.time_saved
                 model2.eval()
          
-                loss_total = 0
-                total_sample = 0
-                acc_total = 0
-                correct = 0
-                
-                global_step = 0
-                with torch.no_grad():
-                    iter_bar = tqdm(self.data_iter2, desc='Iter (f1-score=X.XXX)')
-                    for batch in iter_bar:
-                        batch = [t.to(self.device) for t in batch]
-                        input_ids, segment_ids, input_mask, label_id,seq_lengths = batch
-                    
-                    
-                        loss = get_loss_Attn_LSTM(model2, batch, global_step).mean() # mean() for Data Parallelism
-                        targets, outputs = evalute_Attn_LSTM(model2, batch, global_step3,len(iter_bar))# accuracy to print
-                        
-                        _, predicted = torch.max(outputs.data, 1)
-                        
-                        correct += (np.array(predicted.cpu()) ==
-                                    np.array(targets.cpu())).sum()
-                        loss_total += loss.item() * input_ids.shape[0]
-                        total_sample += input_ids.shape[0]
-                        iter_bar.set_description('Iter (loss=%5.3f)'%loss.item())
-                        
-                        
-                acc_total = correct/total_sample
-                loss_total = loss_total/total_sample
+                metrics = self.evaluate(model2, evalute_Attn_LSTM_SSL, self.data_iter2)
+                acc_total = metrics.accuracy()
+                loss_total = metrics.sample_loss()
                 ddf = open(result_name,'a', encoding='UTF8')
                 ddf.write(str(t)+": "+str(num_a)+"aucr: "+str(acc_total)+'\n')
                 ddf.close()
                 num_a+=1
+                if self.cfg.best_in_memory:
+                    print('Epoch %d : about %.1fs of checkpoint I/O saved by in-memory early stopping'%(e+1, time_saved))
+                self.flush() # end of the round : every checkpoint is on disk
+                self._snapshot(snapshot, e, 'lstm', num_a, curTemp)
                 if(num_a == 20):
                     break
+        if snapshot is not None:
+            snapshot.finish()
+        self.flush(close=True)
+
+    def state_dict(self):
+        """ models and LSTM optimizer, for resume.RunSnapshot
+
+        The BERT optimizer is not kept : every BERT phase starts a new one.
+        """
+        return {'model': self.model.state_dict(), 'model2': self.model2.state_dict(),
+                'optimizer2': self.optimizer2.state_dict()}
+
+    def load_state_dict(self, state):
+        self.model.load_state_dict(state['model'])
+        self.model2.load_state_dict(state['model2'])
+        self.optimizer2.load_state_dict(state['optimizer2'])
+
+    def round_epochs(self, data_iter):
+        "epoch budget of a retraining round on data_iter (None : until early stopping)"
+        if not self.cfg.incremental_rounds or not hasattr(data_iter.dataset, 'n_new'):
+            return None
+        return max(1, -(-data_iter.dataset.n_new // self.cfg.rows_per_epoch))
+
+    def round0_inputs(self):
+        """ what the round-0 models depend on besides their data, for the key of their cache entry
+
+        Every Config field but the RUNTIME_FIELDS, the round-0 patience and BERT learning rate, the
+        optimizer hyperparameters and the parameter shapes of both models.
+        """
+        cfg = sorted((k, v) for k, v in self.cfg._asdict().items() if k not in RUNTIME_FIELDS)
+        optimizers = [[dict((k, v) for k, v in group.items() if k != 'params') for group in optimizer.param_groups]
+                      for optimizer in (self.optimizer2,)]
+        shapes = [[(k, tuple(v.shape)) for k, v in model.state_dict().items()] for model in (self.model, self.model2)]
+        return cfg, ROUND0_PATIENCE, BERT_LR, optimizers, shapes
+
+    def _snapshot(self, snapshot, e, phase, num_a, curTemp):
+        if snapshot is not None:
+            snapshot.save(self, e, phase, {'num_a': num_a, 'curTemp': curTemp})
+
+    def evaluate(self, model, forward, data_iter):
+        """ test loop : RunningMetrics of the model over data_iter, one forward pass per batch
+
+        forward(model, batch) returns the targets and raw logits of a batch;
+        the loss (cross entropy, the training criterion) and the predictions
+        are both derived from these logits.
+        """
+        model.eval()
+        metrics = RunningMetrics(self.device)
+        with torch.no_grad():
+            iter_bar = Progress(data_iter, self.cfg.progress_interval)
+            for batch in iter_bar:
+                batch = [t.to(self.device) for t in batch]
+                targets, logits = forward(model, batch)
+                loss = F.cross_entropy(logits, targets)
+                metrics.add(loss, logits, targets)
+                iter_bar.report(loss)
+        return metrics
 
     def load(self, model_file, pretrain_file):
         """ load saved model or pretrained transformer (a part of model) """
         if model_file:
             print('Loading the model from', model_file)
-            self.model.load_state_dict(torch.load(model_file))
+            self.model.load_state_dict(torch.load(model_file, map_location=self.device))
 
         
     def load2(self, model_file, pretrain_file):
         """ load saved model or pretrained transformer (a part of model) """
         if model_file:
             print('Loading the model from', model_file)
-            self.model2.load_state_dict(torch.load(model_file))
+            self.model2.load_state_dict(torch.load(model_file, map_location=self.device))
             
             
     def load3(self, model_file, pretrain_file):
         """ load saved model or pretrained transformer (a part of model) """
         if model_file:
             print('Loading the model from', model_file)
-            self.model.load_state_dict(torch.load(model_file))
+            self.model.load_state_dict(torch.load(model_file, map_location=self.device))
 
         elif pretrain_file: # use pretrained transformer
             print('Loading the pretrained model from', pretrain_file)
-            if pretrain_file.endswith('.ckpt'): # checkpoint file in tensorflow
-                checkpoint.load_model(self.model.transformer, pretrain_file)
-            elif pretrain_file.endswith('.pt'): # pretrain model file in pytorch
-                self.model.transformer.load_state_dict(
-                    {key[12:]: value
-                        for key, value in torch.load(pretrain_file).items()
-                        if key.startswith('transformer')}
-                ) # load only transformer parts
+            state = pretrained_state(self.model.transformer, pretrain_file)
+            if state is not None: # copied into the current parameters, on their device
+                self.model.transformer.load_state_dict(state)
 
        
 
     def save(self, i):
         """ save current model """
-        torch.save(self.model.state_dict(), # save model object before nn.DataParallel
+        self._save(self.model.state_dict(), # save model object before nn.DataParallel
             os.path.join(self.save_dir, 'model_steps_'+str(i)+'.pt'))
     def save2(self, i):
         """ save current model """
-        torch.save(self.model2.state_dict(), # save model object before nn.DataParallel
+        self._save(self.model2.state_dict(), # save model object before nn.DataParallel
             os.path.join(self.save_dir, 'model_steps_'+str(i)+'.pt'))
+
+    def _save(self, state, path):
+        "write a state dict, in the background if the writer is on"
+        if self.writer is not None:
+            self.writer.save(state, path)
+        else:
+            torch.save(state, path)
+
+    def flush(self, close=False):
+        "wait for the queued checkpoint writes (close : also stop the writer thread)"
+        if self.writer is not None:
+            if close:
+                self.writer.close()
+            else:
+                self.writer.flush()
         
 class Eval(object):
     """Training Helper Class"""
@@ -589,7 +755,7 @@ class Eval(object):
         
         
         
-        model.load_state_dict(torch.load("./model_save/checkpoint_CNN.pt"))
+        model.load_state_dict(torch.load("./model_save/checkpoint_CNN.pt", map_location=self.device))
         model.eval()# evaluation mode
         p=[]
         l=[]
@@ -629,7 +795,7 @@ class Eval(object):
         print("model1_accuracy: ", results2,"model1_f1score: ", F1score) 
         
         
-        model2.load_state_dict(torch.load("./model_save/checkpoint_LSTM.pt"))   
+        model2.load_state_dict(torch.load("./model_save/checkpoint_LSTM.pt", map_location=self.device))   
         model2.eval()# evaluation mode
         p=[]
         l=[]
@@ -4,6 +4,7 @@ import logging
 
 import numpy as np
 import torch
+from torch.utils.data import Dataset
 
 
 def set_seeds(seed):
@@ -13,13 +14,41 @@ def set_seeds(seed):
     torch.manual_seed(seed)
     torch.cuda.manual_seed_all(seed)
 
-def get_device():
-    "get device (CPU or GPU)"
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+def get_device(name=""):
+    "get device (CPU or GPU) : the named one (e.g. 'cpu', 'cuda:1'), else GPU if available"
+    device = torch.device(name or ("cuda" if torch.cuda.is_available() else "cpu"))
     n_gpu = torch.cuda.device_count()
     print("%s (%d GPUs)" % (device, n_gpu))
     return device
 
+def parse_cores(cores):
+    "set of core ids of a list like '0-3,8'"
+    ids = set()
+    for part in cores.split(','):
+        first, _, last = part.partition('-')
+        ids.update(range(int(first), int(last or first)+1))
+    return ids
+
+def set_cpu_threads(n_threads=0, n_interop_threads=0, cores=""):
+    """ CPU execution profile : intra-op and inter-op thread counts and core pinning
+
+    0 keeps the torch default (one intra-op thread per core the process may
+    run on). cores (e.g. '0-3,8') pins the process to those cores, and the
+    intra-op threads default to one per pinned core.
+    """
+    if cores:
+        pinned = parse_cores(cores)
+        os.sched_setaffinity(0, pinned)
+        n_threads = n_threads or len(pinned)
+    if n_threads:
+        torch.set_num_threads(n_threads)
+    if n_interop_threads and torch.get_num_interop_threads() != n_interop_threads:
+        try:
+            torch.set_num_interop_threads(n_interop_threads)
+        except RuntimeError: # can only be set once, before any inter-op parallel work
+            print("inter-op threads already started, keeping %d" % torch.get_num_interop_threads())
+    print("cpu threads : %d intra-op, %d inter-op" % (torch.get_num_threads(), torch.get_num_interop_threads()))
+
 def split_last(x, shape):
     "split the last dimension to given shape"
     shape = list(shape)
@@ -87,3 +116,20 @@ def get_logger(name, log_path):
     logger.setLevel(logging.DEBUG)
     return logger
 
+
+class RowIndexed(Dataset):
+    """ dataset items (of the given rows, all by default) with their row index appended
+
+    Batches then carry the rows they hold, so per-row state can be addressed
+    whatever the batch size and order of the loader.
+    """
+    def __init__(self, dataset, rows=None):
+        self.dataset = dataset
+        self.rows = np.arange(len(dataset)) if rows is None else np.asarray(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        row = int(self.rows[index])
+        return tuple(self.dataset[row]) + (torch.tensor(row),)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the modules of model/ import each other by name ; model_BERT/ holds identical copies (test_trees.py)
+sys.path.insert(0, os.path.join(ROOT, 'model'))
@@ -0,0 +1,108 @@
+""" Ledger records on disk and the balanced selection of pseudo-labeled rows """
+
+import numpy as np
+import pytest
+
+from ledger import Ledger, RECORD
+from pool import PoolState, select_balanced
+
+
+def append_round(ledger, round, n):
+    rows = np.arange(n) + 100*round
+    ledger.append(rows, rows % 3, round, np.full(n, round % 4), np.linspace(0.9, 1, n))
+    return rows
+
+
+def test_read_back(tmp_path):
+    file = str(tmp_path / 'ledger.bin')
+    ledger = Ledger(file)
+    for round, n in ((1, 5), (3, 0), (5, 4)):
+        append_round(ledger, round, n)
+    records = Ledger(file).records
+    assert RECORD.itemsize == 17
+    assert len(records) == 9
+    np.testing.assert_array_equal(records, ledger.records)
+    np.testing.assert_array_equal(records['row'], [100, 101, 102, 103, 104, 500, 501, 502, 503])
+    np.testing.assert_array_equal(records['label'], records['row'] % 3)
+    np.testing.assert_allclose(records['confidence'][:5], np.linspace(0.9, 1, 5).astype(np.float32))
+
+
+def test_rounds_and_rollback(tmp_path):
+    file = str(tmp_path / 'ledger.bin')
+    ledger = Ledger(file)
+    assert ledger.last_round() == 0
+    for round in (1, 3, 5):
+        append_round(ledger, round, 3)
+    assert ledger.last_round() == 5
+    assert list(ledger.rounds(3)['round']) == [3, 3, 3, 5, 5, 5]
+    assert list(ledger.rounds(0, 3)['round']) == [1, 1, 1, 3, 3, 3]
+    assert len(ledger.rounds(2, 2)) == 0
+
+    ledger.rollback(3)
+    assert ledger.last_round() == 1
+    reopened = Ledger(file)
+    np.testing.assert_array_equal(reopened.records, ledger.records)
+    assert len(Ledger(file, reset=True)) == 0
+
+
+def test_torn_tail(tmp_path):
+    file = str(tmp_path / 'ledger.bin')
+    ledger = Ledger(file)
+    append_round(ledger, 1, 4)
+    with open(file, 'ab') as f: # crash in the middle of the next append
+        f.write(np.zeros(1, dtype=RECORD).tobytes()[:7])
+
+    ledger = Ledger(file)
+    assert len(ledger) == 4
+    append_round(ledger, 3, 2)
+    records = Ledger(file).records
+    np.testing.assert_array_equal(records, ledger.records)
+    assert list(records['row']) == [100, 101, 102, 103, 300, 301]
+    assert list(records['round']) == [1]*4 + [3]*2
+
+
+def make_state():
+    # candidates : 5 of class 0, 3 of class 1, 1 of class 2 (row 0 already selected), none of class 3
+    state = PoolState(np.zeros(12))
+    state.candidate[:] = [2, 0, 1, 0, -1, 0, 1, 0, 1, 2, 0, -1]
+    state.selected[0] = True
+    state.pseudo_label[0] = 2
+    return state
+
+
+@pytest.mark.parametrize('balance, n_selected', [(min, 0), (max, 9)])
+def test_select_balanced_all_classes(balance, n_selected):
+    # class 3 has no candidate : min selects nothing, max everything
+    state = make_state()
+    np.random.seed(0)
+    rows = select_balanced(state, 4, balance)
+    assert len(rows) == n_selected
+
+
+@pytest.mark.parametrize('balance, per_class', [(min, [1, 1, 1]), (max, [5, 3, 1])])
+def test_select_balanced(balance, per_class):
+    for seed in range(5):
+        state = make_state()
+        candidate = state.candidate.copy()
+        np.random.seed(seed)
+        rows = select_balanced(state, 3, balance)
+
+        assert list(rows) == sorted(rows)
+        assert 0 not in rows
+        assert list(np.bincount(candidate[rows], minlength=3)) == per_class
+        np.testing.assert_array_equal(state.pseudo_label[rows], candidate[rows])
+        assert state.selected.sum() == 1 + len(rows)
+        assert state.pseudo_label[0] == 2
+        assert (state.pseudo_label[~state.selected] == -1).all()
+
+        again = select_balanced(state, 3, balance) # the rows selected are out of the pool
+        assert not np.isin(again, rows).any()
+
+
+def test_select_balanced_random():
+    picks = set()
+    for seed in range(20):
+        state = make_state()
+        np.random.seed(seed)
+        picks.add(tuple(select_balanced(state, 3, min)))
+    assert len(picks) > 1
@@ -0,0 +1,98 @@
+""" score_pool and LexiconMatcher against the per-sentence substring matching they replaced """
+
+import random
+import re
+
+import numpy as np
+import pytest
+
+from lexicon import Lexicon, LexiconMatcher, PoolIncidence, score_pool
+
+
+def matching_blacklist2(abusive_set, input_sentence, temp):
+    # the original matcher, kept verbatim as the reference
+    result_list = list()
+    for i,abusive_word in enumerate(abusive_set):
+        input_sentence2 = input_sentence.lower().split(' ')
+        abusive_word2 = abusive_word.split(' ')
+        flag=0
+        for l in range(0, len(abusive_word2)):
+            for input in input_sentence2:
+                if abusive_word2[l].lower() in input:
+                    if(len(abusive_word2[l]) >= len(input)-3):
+                        flag+=1
+                        break
+
+        if(flag == temp):
+            result_list.append(abusive_word)
+
+    return result_list
+
+
+def reference_counts(lexicon, sentence, temp):
+    "per-class number of distinct entries matched, as the bootstrap scripts counted them"
+    sentence = re.sub("[!@#$%^&*().?\"~/<>:;'{}]", "", sentence)
+    return [len(set(matching_blacklist2(lexicon.phrases(label), sentence, temp))) for label in range(lexicon.n_labels)]
+
+
+# words with substring relations within and beyond the 3-character slack
+WORDS = ['oil', 'soil', 'toil', 'toiling', 'bank', 'banks', 'banking', 'embankment', 'ban', 'market', 'markets',
+         'supermarket', 'stock', 'stocks', 'stockholder', 'game', 'games', 'endgame', 'win', 'wins', 'winner',
+         'wine', 'team', 'teams', 'steam', 'rate', 'rates', 'pirate', 'corporate', 'war', 'wars', 'award']
+
+
+def random_sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(1, 14))]
+    words = [w.capitalize() if rng.random() < 0.2 else w for w in words]
+    words = [w + rng.choice('.,!?"') if rng.random() < 0.2 else w for w in words]
+    return ' '.join(words) + ' '
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = random.Random(7)
+    lexicon = Lexicon(4)
+    lexicon.update([[' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 5))) for _ in range(12)]
+                    for _ in range(4)])
+    sentences = [random_sentence(rng) for _ in range(300)]
+    return lexicon, sentences
+
+
+def test_some_sentences_match(data):
+    lexicon, sentences = data
+    for temp in (3, 4):
+        assert sum(max(reference_counts(lexicon, s, temp)) > 0 for s in sentences) > 10
+
+
+@pytest.mark.parametrize('k, temp', [(0, 3), (1, 4)])
+def test_score_pool_counts(data, k, temp):
+    lexicon, sentences = data
+    counts = score_pool(PoolIncidence.from_texts(sentences), lexicon)
+    expected = np.array([reference_counts(lexicon, s, temp) for s in sentences])
+    np.testing.assert_array_equal(counts[k], expected)
+
+
+@pytest.mark.parametrize('k, temp', [(0, 3), (1, 4)])
+def test_matcher_counts(data, k, temp):
+    lexicon, sentences = data
+    matcher = LexiconMatcher(lexicon)
+    for s in sentences:
+        assert list(matcher.count_sentence(s)[k]) == reference_counts(lexicon, s, temp)
+
+
+def test_repeated_entry_words():
+    "an entry word matched once counts once per occurrence in the entry"
+    lexicon = Lexicon(2)
+    lexicon.update([['bank bank rates'], ['oil wars game market']])
+    sentences = ['Banks and rates ', 'toil wars games market ', 'oil ', '']
+    for k, temp in ((0, 3), (1, 4)):
+        expected = np.array([reference_counts(lexicon, s, temp) for s in sentences])
+        np.testing.assert_array_equal(score_pool(PoolIncidence.from_texts(sentences), lexicon)[k], expected)
+
+
+def test_update_drops_reordered_entries():
+    lexicon = Lexicon(2)
+    lexicon.update([['Oil wars market', 'market oil wars', 'wars market oil team', 'bank bank rates', 'rates bank bank'],
+                    ['market oil wars']])
+    assert lexicon.phrases(0) == ['oil wars market', 'wars market oil team', 'bank bank rates']
+    assert lexicon.phrases(1) == ['market oil wars']
@@ -0,0 +1,82 @@
+""" decide_labels : rule priority and the dataset flag combinations """
+
+import numpy as np
+import pytest
+import torch
+
+from pseudo_label import decide_labels, RULE_LEXICON, RULE_LEXICON_ALONE, RULE_AGREEMENT
+
+
+# (n_labels, lexicon_alone) of the bootstrap scripts
+DATASETS = {'AGNews': (4, True), 'IMDB': (2, True), 'yahoo': (10, False), 'dbpedia': (14, True)}
+
+NONE = (-1, 0, 0.0)
+
+# n3, n4 (classes 0 and 1), pred1, conf1, pred2, conf2 -> (label, rule, confidence) with / without lexicon_alone
+CASES = [
+    ('3-word winner backed by model 1',      [2, 0], [0, 3], 0, .95, 1, .50, (0, RULE_LEXICON, .95), (0, RULE_LEXICON, .95)),
+    ('3-word winner backed at exactly 0.9',  [0, 1], [0, 0], 0, .99, 1, .90, (1, RULE_LEXICON, .90), (1, RULE_LEXICON, .90)),
+    ('3-word winner over agreement',         [1, 0], [0, 2], 0, .95, 0, .97, (0, RULE_LEXICON, .97), (0, RULE_LEXICON, .97)),
+    ('3-word winner backed at 0.89',         [0, 1], [2, 0], 1, .89, 0, .30, (0, RULE_LEXICON_ALONE, .30), NONE),
+    ('3-word winner not backed',             [0, 1], [0, 0], 0, .99, 0, .99, (0, RULE_AGREEMENT, .99), (0, RULE_AGREEMENT, .99)),
+    ('4-word winner over agreement',         [0, 0], [0, 1], 0, .99, 0, .98, (1, RULE_LEXICON_ALONE, 0.), (0, RULE_AGREEMENT, .99)),
+    ('3-word tie : 4-word winner',           [2, 2], [1, 0], 1, .95, 1, .92, (0, RULE_LEXICON_ALONE, 0.), (1, RULE_AGREEMENT, .95)),
+    ('3-word tie : agreement',               [2, 2], [0, 0], 1, .95, 1, .92, (1, RULE_AGREEMENT, .95), (1, RULE_AGREEMENT, .95)),
+    ('4-word tie, models disagree',          [0, 0], [1, 1], 0, .95, 1, .95, NONE, NONE),
+    ('no match, agreement below 0.9',        [0, 0], [0, 0], 1, .95, 1, .85, NONE, NONE),
+    ('no match, models disagree',            [0, 0], [0, 0], 0, .99, 1, .99, NONE, NONE),
+]
+
+
+def pad(counts, n_labels):
+    return counts + [0]*(n_labels-len(counts))
+
+
+@pytest.mark.parametrize('dataset', sorted(DATASETS))
+def test_priority(dataset):
+    n_labels, lexicon_alone = DATASETS[dataset]
+    n3 = torch.tensor([pad(case[1], n_labels) for case in CASES])
+    n4 = torch.tensor([pad(case[2], n_labels) for case in CASES])
+    pred1, pred2 = (torch.tensor([case[i] for case in CASES]) for i in (3, 5))
+    conf1, conf2 = (torch.tensor([case[i] for case in CASES], dtype=torch.float64) for i in (4, 6))
+    labels, rules, label_conf = decide_labels(n3, n4, pred1, conf1, pred2, conf2, lexicon_alone=lexicon_alone)
+    for i, case in enumerate(CASES):
+        expected = case[7] if lexicon_alone else case[8]
+        assert (labels[i].item(), rules[i].item()) == expected[:2], case[0]
+        assert label_conf[i].item() == pytest.approx(expected[2]), case[0]
+
+
+def reference(n3, n4, pred1, conf1, pred2, conf2, lexicon_alone, confidence=0.9):
+    "the per-sentence cascade of the bootstrap scripts"
+    def winner(counts):
+        top = max(counts)
+        return counts.index(top) if top >= 1 and counts.count(top) == 1 else -1
+    w3, w4 = winner(n3), winner(n4)
+    if w3 >= 0 and ((pred1 == w3 and conf1 >= confidence) or (pred2 == w3 and conf2 >= confidence)):
+        label, rule = w3, RULE_LEXICON
+    elif lexicon_alone and w4 >= 0:
+        label, rule = w4, RULE_LEXICON_ALONE
+    elif pred1 == pred2 and conf1 >= confidence and conf2 >= confidence:
+        label, rule = pred1, RULE_AGREEMENT
+    else:
+        return NONE
+    return label, rule, max([c for p, c in ((pred1, conf1), (pred2, conf2)) if p == label] or [0.])
+
+
+@pytest.mark.parametrize('dataset', sorted(DATASETS))
+def test_random_against_reference(dataset):
+    n_labels, lexicon_alone = DATASETS[dataset]
+    rng = np.random.RandomState(n_labels)
+    n = 2000
+    n3 = rng.binomial(2, 0.15, (n, n_labels))
+    n4 = rng.binomial(1, 0.1, (n, n_labels))
+    pred1 = rng.randint(n_labels, size=n)
+    pred2 = np.where(rng.rand(n) < 0.5, pred1, rng.randint(n_labels, size=n))
+    conf1, conf2 = (rng.choice([.5, .89, .9, .95, 1.], size=n) for _ in range(2))
+    labels, rules, label_conf = decide_labels(n3, n4, *(torch.from_numpy(x) for x in (pred1, conf1, pred2, conf2)),
+                                              lexicon_alone=lexicon_alone)
+    result = list(zip(labels.tolist(), rules.tolist(), label_conf.tolist()))
+    expected = [reference(n3[i].tolist(), n4[i].tolist(), pred1[i], conf1[i], pred2[i], conf2[i], lexicon_alone)
+                for i in range(n)]
+    assert result == expected
+    assert len(set(rules.tolist())) == (4 if lexicon_alone else 3)
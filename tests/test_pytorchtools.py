@@ -0,0 +1,32 @@
+""" EarlyStopping with the best weights in memory, persisted through the background writer """
+
+import time
+
+import torch
+
+from checkpoint_writer import CheckpointWriter
+from pytorchtools import EarlyStopping
+
+
+def test_persist_times_its_own_write(tmp_path, monkeypatch):
+    save = torch.save
+    def slow_save(*args, **kwargs):
+        time.sleep(0.2)
+        save(*args, **kwargs)
+    monkeypatch.setattr(torch, 'save', slow_save)
+
+    writer = CheckpointWriter()
+    early_stopping = EarlyStopping(in_memory=True, writer=writer)
+    model = torch.nn.Linear(4, 2)
+    name = str(tmp_path / 'best.pt')
+    for val_loss in (3., 2., 1.):
+        with torch.no_grad():
+            model.weight.add_(1.)
+        early_stopping(val_loss, model, name)
+    early_stopping.persist()
+
+    # the write is done when persist() returns, and time_saved is timed by it : 3 writes replaced by 1
+    assert writer.write_time[name] >= 0.2
+    assert early_stopping.time_saved > 0.2
+    torch.testing.assert_close(torch.load(name)['weight'], model.weight.detach())
+    writer.close()
@@ -0,0 +1,14 @@
+""" The modules tested here are shared, byte for byte, by model/ and model_BERT/ """
+
+import os
+
+import pytest
+
+from conftest import ROOT
+
+
+@pytest.mark.parametrize('name', ['lexicon.py', 'pseudo_label.py', 'ledger.py', 'pool.py',
+                                  'checkpoint_writer.py', 'pytorchtools.py'])
+def test_same_in_both_trees(name):
+    with open(os.path.join(ROOT, 'model', name), 'rb') as a, open(os.path.join(ROOT, 'model_BERT', name), 'rb') as b:
+        assert a.read() == b.read()